@@ -1,7 +1,55 @@
 #!/usr/bin/env python3
 
-from itertools import cycle, repeat
-from .term import TermThings, TermScreenRGB
+from itertools import count
+from bisect import bisect_right
+from math import inf
+from .term import TermThings, TermScreenRGB, Sprite
+from .cache import FrameCache
+
+class Effect:
+    """
+    An effect which can produce any one of its frames directly, without producing the ones before it.
+
+    An effect is made up of its number of frames (possibly infinite), and a framefunc which maps a
+    sprite and a frame index to the corresponding frame. Like any other effect, calling it on a drawable
+    object yields its frames in order.
+    """
+
+    def __init__(self, frames, framefunc, fps=None):
+        self.frames = frames
+        self.framefunc = framefunc
+        self.fps = fps
+
+    def __call__(self, thing):
+        thing = Sprite.of(thing)
+        for n in (count() if self.frames == inf else range(self.frames)):
+            yield self.framefunc(thing, n)
+
+    def frame(self, thing, n):
+        """
+        Produces frame n of this effect acting on a drawable object.
+        """
+
+        if not 0 <= n < self.frames:
+            raise IndexError(f"frame {n} out of range")
+        return self.framefunc(Sprite.of(thing), n)
+
+    def last(self, thing):
+        """
+        Produces the last frame of this effect, or the object itself if there are no frames.
+        """
+
+        return self.frame(thing, self.frames - 1) if self.frames else Sprite.of(thing)
+
+    def duration(self):
+        """
+        The duration of this effect in seconds, which may be infinite.
+        """
+
+        if not self.fps:
+            return inf if self.frames else 0.0
+        return self.frames / self.fps
+
 
 class Effects:
     """
@@ -14,11 +62,11 @@ class Effects:
     Animating an object is intended to be of the following form.
     >>> from termanim.term import *
     >>> from termanim.anim import *
-    >>> from itertools import zip_longest
-    >>> from time import sleep
+    >>> from termanim.clock import FrameClock
 
     >>> term = TermScreenRGB((2, 8))
     >>> fps = 30
+    >>> clock = FrameClock(fps)
 
     >>> hello = TermThings.text("Hello", 0, 0, fg=(255, 255, 255))
     >>> world = TermThings.text("World", 1, 2, fg=(255, 255, 255), alpha=0.0)
@@ -34,12 +82,16 @@ class Effects:
     >>> ])
     >>> frames = zip(effect_hello(hello), effect_world(world))
 
-    >>> for frame in frames:
+    >>> for frame in clock.run(frames):
     >>>     term.draw_things(*frame)
     >>>     term.paint()
-    >>>     sleep(1 / fps)
 
     Note that this animation will not stop until it is interrupted.
+
+    The built-in effects are Effect objects, which can also produce any one of their frames directly.
+    The same holds for chained and looped effects, as long as all the effects they are made of are
+    Effect objects. A Timeline plays such an effect with random access, allowing seeking and playing
+    in reverse.
     """
 
     def chain(effects):
@@ -52,45 +104,110 @@ class Effects:
         frame, which ought to be blue.
         """
 
+        effects = list(effects)
+        if all(isinstance(effect, Effect) for effect in effects):
+            return Effects._chain_effect(effects)
+
         def animate(thing):
-            thing = list(thing)
+            thing = Sprite.of(thing)
             for effect in effects:
                 for frame in effect(thing):
-                    thing = list(frame)
+                    thing = Sprite.of(frame)
                     yield thing
         return animate
 
-    def cycle(effect):
+    def _chain_effect(effects):
+        """
+        Chains together a list of Effect objects into a single Effect. The frame index at which each
+        effect starts acts as a keyframe, so that any frame is found by a binary search.
+
+        The object passed into each effect depends on the last frames of the effects before it, which
+        are remembered for the latest object acted on.
+        """
+
+        starts, start = [], 0
+        for effect in effects:
+            starts.append(start)
+            start += effect.frames
+        inputs = [None, None]
+
+        def framefunc(thing, n):
+            k = bisect_right(starts, n) - 1
+            while effects[k].frames == 0:
+                k -= 1
+            if inputs[0] is not thing:
+                inputs[:] = [thing, [thing]]
+            known = inputs[1]
+            while len(known) <= k:
+                known.append(Sprite.of(effects[len(known) - 1].last(known[-1])))
+            return Sprite.of(effects[k].frame(known[k], n - starts[k]))
+
+        fps = next((effect.fps for effect in effects if effect.fps), None)
+        return Effect(start, framefunc, fps)
+
+    def cycle(effect, cache=None):
         """
         Creates a looped version of a supplied effect. Assumes that the supplied effect produces
         finitely many frames.
+
+        Frames are kept in a FrameCache, keyed by the looped object and the index of the frame, so
+        that later loops are just lookups. Frames evicted from the cache to stay within its memory
+        budget are produced again by replaying the supplied effect. A cache can be shared between
+        several looped effects; by default each looped object gets its own. Looping an Effect object
+        needs no cache, since any of its frames can be produced directly.
         """
 
+        if isinstance(effect, Effect) and effect.frames < inf:
+            if not effect.frames:
+                return Effect(0, effect.framefunc, effect.fps)
+            return Effect(inf, lambda thing, n: effect.framefunc(thing, n % effect.frames), effect.fps)
+
         def animate(thing):
-            frames = (list(frame) for frame in effect(thing))
-            yield from cycle(frames)
+            frames_cache = cache if cache is not None else FrameCache()
+            thing = Sprite.of(thing)
+            key = object()
+            frames = 0
+            for frame in effect(thing):
+                frame = Sprite.of(frame)
+                frames_cache.put((key, frames), frame, Effects._sizeof(frame))
+                frames += 1
+                yield frame
+            replay, position = None, 0
+            while frames:
+                for i in range(frames):
+                    frame = frames_cache.get((key, i))
+                    if frame is None:
+                        if replay is None or position > i:
+                            replay, position = effect(thing), 0
+                        for frame in replay:
+                            position += 1
+                            if position > i:
+                                break
+                        frame = Sprite.of(frame)
+                        frames_cache.put((key, i), frame, Effects._sizeof(frame))
+                    yield frame
         return animate
 
+    def _sizeof(frame):
+        """
+        A rough estimate of the memory taken up by a frame, in bytes.
+        """
+
+        return 256 + 64 * len(frame)
+
     def static(fps, duration):
         """
         Creates an effect which produces static, identical frames, useful for padding.
         """
 
-        frames = int(duration * fps)
-        def animate(thing):
-            thing = list(thing)
-            yield from repeat(thing, frames)
-        return animate
+        return Effect(int(duration * fps), lambda thing, n: thing, fps)
     
     def forever():
         """
         Creates an effect which produces identical frames forever.
         """
 
-        def animate(thing):
-            thing = list(thing)
-            yield from repeat(thing)
-        return animate
+        return Effect(inf, lambda thing, n: thing)
 
     def alpha(fps, duration, alpha_init=0.0, alpha_final=1.0, alphafunc=None):
         """
@@ -105,11 +222,7 @@ class Effects:
         if not alphafunc:
             alphafunc = lambda t: alpha_init + (alpha_final - alpha_init) * t
         frames = int(duration * fps)
-        def animate(thing):
-            thing = list(thing)
-            for i in range(frames):
-                yield TermThings.alpha(thing, alphafunc(i / frames))
-        return animate
+        return Effect(frames, lambda thing, n: TermThings.alpha(thing, alphafunc(n / frames)), fps)
     
     def fg(fps, duration, fg_init="", fg_final="", fgfunc=None):
         """
@@ -122,11 +235,7 @@ class Effects:
         if not fgfunc:
             fgfunc = lambda t: TermScreenRGB._mix_rgb(fg_init, fg_final, t)
         frames = int(duration * fps)
-        def animate(thing):
-            thing = list(thing)
-            for i in range(frames):
-                yield TermThings.fg(thing, fgfunc(i / frames))
-        return animate
+        return Effect(frames, lambda thing, n: TermThings.fg(thing, fgfunc(n / frames)), fps)
     
     def bg(fps, duration, bg_init="", bg_final="", bgfunc=None):
         """
@@ -139,20 +248,81 @@ class Effects:
         if not bgfunc:
             bgfunc = lambda t: TermScreenRGB._mix_rgb(bg_init, bg_final, t)
         frames = int(duration * fps)
-        def animate(thing):
-            thing = list(thing)
-            for i in range(frames):
-                yield TermThings.bg(thing, bgfunc(i / frames))
-        return animate
+        return Effect(frames, lambda thing, n: TermThings.bg(thing, bgfunc(n / frames)), fps)
+
+
+class Timeline:
+    """
+    Plays an Effect on a drawable object with random access.
+
+    Any frame can be looked up by its index, in constant time for the built-in effects, so seeking
+    to a point in time or playing backwards does not compute the frames before it. Negative indices
+    count from the end, as with lists, if the effect is finite.
+    """
+
+    def __init__(self, effect, thing, fps=None):
+        self.effect = effect
+        self.thing = Sprite.of(thing)
+        self.fps = fps if fps is not None else effect.fps
+        self.position = 0
+
+    def __len__(self):
+        if self.effect.frames == inf:
+            raise TypeError("infinite timeline has no length")
+        return self.effect.frames
+
+    def __getitem__(self, n):
+        if n < 0:
+            n += self.effect.frames
+        return self.effect.frame(self.thing, n)
+
+    def duration(self):
+        """
+        The total duration of the timeline in seconds, which may be infinite.
+        """
+
+        return self.effect.frames / self.fps if self.fps else inf
+
+    def seek(self, n=None, seconds=None):
+        """
+        Moves the current position to frame n, or to the given time in seconds. Seeking by time needs
+        the timeline to have a frame-rate.
+        """
+
+        if seconds is not None:
+            if self.fps is None:
+                raise ValueError("seeking by time needs a timeline with an fps")
+            n = int(seconds * self.fps)
+        if n < 0:
+            n += self.effect.frames
+        self.position = min(max(n, 0), self.effect.frames)
+
+    def play(self, step=1):
+        """
+        Streams frames from the current position onwards, moving step frames at a time. A negative
+        step plays the timeline in reverse, back to the first frame.
+        """
+
+        while 0 <= self.position < self.effect.frames:
+            yield self[self.position]
+            self.position += step
+
+    def reversed(self):
+        """
+        Streams every frame, from the last one to the first.
+        """
+
+        self.seek(-1)
+        return self.play(-1)
 
 
 if __name__ == '__main__':
     from .term import *
-    from time import time, sleep
+    from .clock import FrameClock
     from itertools import zip_longest
 
     fps = 30
-    period = 1 / 30
+    clock = FrameClock(fps)
     
     term = TermScreenRGB(size=(8, 32))
 
@@ -177,13 +347,6 @@ if __name__ == '__main__':
 
     frames = zip_longest(fade_fg(hello), fade_bg(text), fillvalue=[])
     
-    t_0 = time()
-    for frame in frames:
+    for frame in clock.run(frames):
         term.draw_things(*frame)
         term.paint()
-
-        t = time()
-        t_next = t_0 + period
-        if t < t_next:
-            sleep(t_next - t)
-        t_0 = time()
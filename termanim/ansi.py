@@ -14,11 +14,22 @@ class ANSICodes:
     UNBOLD = "\033[2m"
     HIDE_CURSOR = "\033[?25l"
     SHOW_CURSOR = "\033[?25h"
+    FORWARD = "\033[{}C"                # columns
+    REPEAT = "\033[{}b"                 # times the previous character is repeated
+    ERASE = "\033[{}X"                  # characters erased
+    SCROLL_REGION = "\033[{};{}r"       # top line, bottom line
+    RESET_SCROLL_REGION = "\033[r"
+    SCROLL_UP = "\033[{}S"              # lines
+    SCROLL_DOWN = "\033[{}T"            # lines
 
     # 24 bit colour code formats
     FG_RGB = "\033[38;2;{};{};{}m"      # red, green, blue
     BG_RGB = "\033[48;2;{};{};{}m"      # red, green, blue
 
+    # 256 colour code formats
+    FG_256 = "\033[38;5;{}m"            # colour index
+    BG_256 = "\033[48;5;{}m"            # colour index
+
     # Basic console foreground colours
     FG_BLACK   = "\033[30m"
     FG_RED     = "\033[31m"
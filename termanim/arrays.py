@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+
+from itertools import repeat
+from time import perf_counter
+import numpy as np
+
+from .term import TermScreenRGB, Sprite
+
+class TermScreenArray(TermScreenRGB):
+    """
+    A version of TermScreenRGB whose screenbuffer is stored in NumPy arrays, instead of a dictionary
+    of tuples. The screen is made up of a plane of characters, planes of foreground and background
+    colours (as RGB bytes) and a mask of bold cells.
+
+    Drawable objects passed to draw_things are blended onto the screen all at once, which is much
+    faster than blending them one cell at a time. The per-cell draw method still works as before.
+    Note that the background colour must be an RGB tuple.
+    """
+
+    def __init__(self, size=None, offset=(0, 0), wrap=False, bg=(0, 0, 0), writer=None, stats=None, depth="truecolor"):
+        super().__init__(size, offset, wrap, bg, writer, stats, depth)
+        self._set_lut()
+        self.redraw = np.ones((self.lines, self.columns), dtype=bool)
+        self.redraw_past = np.zeros((self.lines, self.columns), dtype=bool)
+        self._candidates = np.zeros((self.lines, self.columns), dtype=bool)
+        self.frozen = np.zeros((self.lines, self.columns), dtype=bool)
+        self.base_char = self.char_plane.copy()
+        self.base_fg = self.fg_plane.copy()
+        self.base_bg = self.bg_plane.copy()
+        self.base_bold = self.bold_plane.copy()
+
+    def _set_lut(self):
+        """
+        Sets up the lookup table of the palette as arrays, for quantizing whole planes at once.
+        """
+
+        if self.palette is not None:
+            self._lut = np.frombuffer(self.palette.lut, dtype=np.uint8)
+            self._lut_colours = np.array(self.palette.colours, dtype=np.uint8)
+
+    def set_depth(self, depth):
+        super().set_depth(depth)
+        self._set_lut()
+
+    def _reset_displayed(self):
+        """
+        Forget what is displayed on the terminal. The displayed cells are kept in planes like
+        those of the screenbuffer, along with a mask of the cells which are known.
+        """
+
+        shape = (self.lines, self.columns)
+        self.shown = np.zeros(shape, dtype=bool)
+        self.shown_char = np.full(shape, " ", dtype="<U1")
+        self.shown_fg = np.zeros(shape + (3,), dtype=np.uint8)
+        self.shown_bg = np.zeros(shape + (3,), dtype=np.uint8)
+        self.shown_bold = np.zeros(shape, dtype=bool)
+
+    def _reset_screen(self):
+        """
+        Reset the screenbuffer planes.
+        """
+
+        shape = (self.lines, self.columns)
+        self.char_plane = np.full(shape, " ", dtype="<U1")
+        self.fg_plane = np.empty(shape + (3,), dtype=np.uint8)
+        self.fg_plane[...] = self.bg
+        self.bg_plane = self.fg_plane.copy()
+        self.bold_plane = np.zeros(shape, dtype=bool)
+
+    @property
+    def screen(self):
+        """
+        A dictionary-like view of the screenbuffer, keyed by (line, column).
+        """
+
+        return _ScreenView(self)
+
+    def draw(self, char, line, column, fg="", bg="", bold=False, alpha=1.0, *args):
+        """
+        Draws a single cell onto the screenbuffer, exactly as TermScreenRGB.draw does.
+        """
+
+        if not self.wrap and (line, column) not in self.screen:
+            return
+        line = line % self.lines
+        column = column % self.columns
+        bg_ = tuple(self.bg_plane[line, column].tolist())
+        self.char_plane[line, column] = char
+        self.fg_plane[line, column] = np.rint(TermScreenRGB._mix_rgb(bg_, fg, alpha))
+        self.bg_plane[line, column] = np.rint(TermScreenRGB._mix_rgb(bg_, bg, alpha))
+        self.bold_plane[line, column] = bold
+        self.redraw[line, column] = True
+
+    def draw_things(self, *things):
+        """
+        Draws the supplied objects onto the screenbuffer, in order. Each object is blended onto
+        the screen as a whole.
+        """
+
+        t = perf_counter() if self.stats is not None else None
+        for thing in things:
+            columns = TermScreenArray._columns(thing)
+            if columns is not None:
+                self._blend(*columns)
+        if t is not None:
+            self._timed_draw(t)
+
+    def draw_batch(self, *things):
+        """
+        Every object is drawn as a whole by draw_things, so this is the same as draw_things.
+        """
+
+        self.draw_things(*things)
+
+    def paste(self, line, column, chars, fg, bg):
+        """
+        Pastes a block of opaque cells onto the screenbuffer, with its top left corner at (line, column).
+        The characters are given as a single character or an array of characters, and the foreground
+        and background colours as arrays of RGB values, with one row for each line of the block. The
+        block is clipped to the screen, or wrapped around if the wrap option was set.
+        """
+
+        t = perf_counter() if self.stats is not None else None
+        height, width = fg.shape[:2]
+        chars = np.broadcast_to(np.asarray(chars, dtype="<U1"), (height, width))
+        if self.wrap:
+            index = np.ix_(np.arange(line, line + height) % self.lines, np.arange(column, column + width) % self.columns)
+            block = (slice(None), slice(None))
+        else:
+            top, left = max(line, 0), max(column, 0)
+            bottom, right = min(line + height, self.lines), min(column + width, self.columns)
+            if top >= bottom or left >= right:
+                return
+            index = (slice(top, bottom), slice(left, right))
+            block = (slice(top - line, bottom - line), slice(left - column, right - column))
+        self.char_plane[index] = chars[block]
+        self.fg_plane[index] = fg[block]
+        self.bg_plane[index] = bg[block]
+        self.bold_plane[index] = False
+        self.redraw[index] = True
+        if t is not None:
+            self._timed_draw(t)
+
+    def _columns(thing):
+        """
+        Splits a drawable object into arrays of characters, lines, columns, foreground colours,
+        foreground masks, background colours, background masks, bold flags and alpha values.
+        The masks mark the cells which actually have a colour, instead of an empty one.
+
+        The arrays of a sprite are kept in its cache, so they are only built once for all the sprites
+        sharing the same columns. The translation and overrides of the sprite are then applied to them.
+        """
+
+        thing = Sprite.of(thing)
+        if not len(thing):
+            return None
+        arrays = thing._cache.get("arrays")
+        if arrays is None:
+            arrays = thing._cache["arrays"] = (
+                np.array(thing.chars, dtype="<U1"),
+                np.array(thing.lines, dtype=np.intp),
+                np.array(thing.columns, dtype=np.intp),
+                *TermScreenArray._sprite_colours(thing, "fgs"),
+                *TermScreenArray._sprite_colours(thing, "bgs"),
+                np.array(thing.bolds, dtype=bool),
+                np.array(thing.alphas, dtype=np.float32),
+            )
+        chars, lines, columns, fg, fg_mask, bg, bg_mask, bold, alpha = arrays
+
+        dy, dx = thing.offset
+        if dy:
+            lines = lines + dy
+        if dx:
+            columns = columns + dx
+        if thing.fg is not None:
+            fg, fg_mask = TermScreenArray._colours(repeat(thing.fg, len(thing)))
+        if thing.bg is not None:
+            bg, bg_mask = TermScreenArray._colours(repeat(thing.bg, len(thing)))
+        if thing.alpha is not None:
+            alpha = np.full(len(thing), thing.alpha, dtype=np.float32)
+        return chars, lines, columns, fg, fg_mask, bg, bg_mask, bold, alpha
+
+    def _sprite_colours(thing, name):
+        """
+        Converts a column of colours of a sprite into an array of RGB values and a mask, using the
+        array already held by the sprite if there is one.
+        """
+
+        rgb = thing.rgb(name)
+        if rgb is not None:
+            return rgb.astype(np.float32), np.ones(len(rgb), dtype=bool)
+        return TermScreenArray._colours(getattr(thing, name))
+
+    def _colours(colours):
+        """
+        Converts a sequence of colours into an array of RGB values, along with a mask marking the
+        colours which are not empty.
+        """
+
+        colours = list(colours)
+        mask = np.array([bool(colour) for colour in colours], dtype=bool)
+        rgb = np.array([colour if colour else (0, 0, 0) for colour in colours], dtype=np.float32)
+        return rgb.reshape(-1, 3), mask
+
+    def _blend(self, chars, lines, columns, fg, fg_mask, bg, bg_mask, bold, alpha):
+        """
+        Blends arrays of cells onto the screenbuffer, as split up by _columns.
+
+        Cells which fall on the same coordinates are blended in order, one layer at a time, so that
+        the result is the same as drawing each cell individually.
+        """
+
+        if self.wrap:
+            lines = lines % self.lines
+            columns = columns % self.columns
+        cells = (chars, lines, columns, fg, fg_mask, bg, bg_mask, bold, alpha)
+        if not self.wrap:
+            keep = (lines >= 0) & (lines < self.lines) & (columns >= 0) & (columns < self.columns)
+            if not keep.all():
+                cells = tuple(column[keep] for column in cells)
+                lines, columns = cells[1], cells[2]
+        if not len(lines):
+            return
+
+        index = lines * self.columns + columns
+        order = np.argsort(index, kind="stable")
+        index = index[order]
+        starts = np.ones(len(index), dtype=bool)
+        starts[1:] = index[1:] != index[:-1]
+        if starts.all():
+            self._blend_layer(*cells)
+            return
+        position = np.arange(len(index))
+        rank = np.empty(len(index), dtype=np.intp)
+        rank[order] = position - np.maximum.accumulate(np.where(starts, position, 0))
+        for r in range(rank.max() + 1):
+            layer = rank == r
+            self._blend_layer(*(column[layer] for column in cells))
+
+    def _blend_layer(self, chars, lines, columns, fg, fg_mask, bg, bg_mask, bold, alpha):
+        """
+        Blends arrays of cells with distinct coordinates onto the screenbuffer.
+        """
+
+        base = self.bg_plane[lines, columns].astype(np.float32)
+        alpha = alpha[:, None]
+        fg_new = np.where(fg_mask[:, None], base + (fg - base) * alpha, base)
+        bg_new = np.where(bg_mask[:, None], base + (bg - base) * alpha, base)
+        self.char_plane[lines, columns] = chars
+        self.fg_plane[lines, columns] = np.rint(fg_new)
+        self.bg_plane[lines, columns] = np.rint(bg_new)
+        self.bold_plane[lines, columns] = bold
+        self.redraw[lines, columns] = True
+
+    def _redraw_cells(self):
+        """
+        Streams the cells which need to be redrawn, in order, as tuples of the form
+        (line, column, char, fg, bg, bold).
+
+        As with TermScreen, cells which look exactly like what is already displayed are skipped.
+        The comparison is done on whole planes at once.
+        """
+
+        np.logical_or(self.redraw, self.redraw_past, out=self._candidates)
+        lines, columns = np.nonzero(self._candidates)
+        char = self.char_plane[lines, columns]
+        fg = self.fg_plane[lines, columns]
+        bg = self.bg_plane[lines, columns]
+        if self.palette is not None:
+            fg, bg = self._quantize(fg), self._quantize(bg)
+        bold = self.bold_plane[lines, columns]
+        blank = char == " "
+        bold &= ~blank
+
+        changed = ~self.shown[lines, columns]
+        changed |= char != self.shown_char[lines, columns]
+        changed |= (bg != self.shown_bg[lines, columns]).any(axis=1)
+        changed |= ~blank & (fg != self.shown_fg[lines, columns]).any(axis=1)
+        changed |= bold != self.shown_bold[lines, columns]
+
+        self.cells_skipped = len(lines) - int(changed.sum())
+        self.cells_emitted = len(lines) - self.cells_skipped
+        lines, columns = lines[changed], columns[changed]
+        self._emitted = (lines, columns)
+        char, fg, bg, bold, blank = char[changed], fg[changed], bg[changed], bold[changed], blank[changed]
+        self.shown[lines, columns] = True
+        self.shown_char[lines, columns] = char
+        self.shown_fg[lines, columns] = fg
+        self.shown_bg[lines, columns] = bg
+        self.shown_bold[lines, columns] = bold
+
+        fgs = [fg_ if not blank_ else "" for fg_, blank_ in zip(map(tuple, fg.tolist()), blank.tolist())]
+        yield from zip(
+            lines.tolist(),
+            columns.tolist(),
+            char.tolist(),
+            fgs,
+            map(tuple, bg.tolist()),
+            bold.tolist(),
+        )
+
+    def _changed_rows(self):
+        return np.nonzero((self.redraw | self.redraw_past).any(axis=1))[0].tolist()
+
+    def _row_keys(self, rows):
+        """
+        Keys for the visible contents of the supplied rows and the displayed contents of each row, as
+        with TermScreen. Each key is made up of the bytes of the planes along the row.
+        """
+
+        fg, bg = self.fg_plane[rows], self.bg_plane[rows]
+        if self.palette is not None:
+            fg = self._quantize(fg.reshape(-1, 3)).reshape(fg.shape)
+            bg = self._quantize(bg.reshape(-1, 3)).reshape(bg.shape)
+        char = self.char_plane[rows]
+        blank = char == " "
+        new = [None] * self.lines
+        keys = TermScreenArray._row_bytes(char, fg * ~blank[:, :, None], bg, self.bold_plane[rows] & ~blank)
+        for i, key in zip(rows, keys):
+            new[i] = key
+        blank = self.shown_char == " "
+        old = TermScreenArray._row_bytes(self.shown_char, self.shown_fg * ~blank[:, :, None], self.shown_bg, self.shown_bold)
+        known = self.shown.all(axis=1).tolist()
+        return new, [row if k else None for row, k in zip(old, known)]
+
+    def _row_bytes(char, fg, bg, bold):
+        """
+        The bytes of each row of a set of planes.
+        """
+
+        lines = char.shape[0]
+        planes = [char.view(np.uint8).reshape(lines, -1), fg.reshape(lines, -1), bg.reshape(lines, -1), bold.view(np.uint8)]
+        return [row.tobytes() for row in np.concatenate(planes, axis=1)]
+
+    def _shift_rows(self, top, bottom, shift, matched):
+        """
+        Moves what is displayed on the rows from top to bottom by the supplied shift, as with
+        TermScreen, and marks every cell of those rows apart from the matched rows to be compared
+        during this paint.
+        """
+
+        source = np.arange(top, bottom + 1) + shift
+        moved = (source >= top) & (source <= bottom)
+        for plane in (self.shown, self.shown_char, self.shown_fg, self.shown_bg, self.shown_bold):
+            plane[top:bottom + 1][moved] = plane[source[moved]]
+        self.shown[top:bottom + 1][~moved] = False
+        compare = np.ones(bottom + 1 - top, dtype=bool)
+        compare[np.asarray(matched) - top] = False
+        self.redraw_past[top:bottom + 1][compare] = True
+
+    def _scrolled_rows(self, top, bottom):
+        emitted = np.zeros((self.lines, self.columns), dtype=bool)
+        emitted[self._emitted] = True
+        emitted[top:bottom + 1] = True
+        self._emitted = np.nonzero(emitted)
+
+    def _quantize(self, colours):
+        """
+        Quantizes an array of RGB colours to the palette, through its lookup table.
+        """
+
+        top = colours >> 3
+        index = (top[:, 0].astype(np.intp) << 10) | (top[:, 1].astype(np.intp) << 5) | top[:, 2]
+        return self._lut_colours[self._lut[index]]
+
+    def _cells_drawn(self):
+        return int(np.count_nonzero(self.redraw))
+
+    def freeze(self):
+        """
+        Makes everything drawn so far during this frame part of the background, as with TermScreen.
+        The background is kept in planes like those of the screenbuffer.
+        """
+
+        lines, columns = np.nonzero(self.redraw)
+        self.base_char[lines, columns] = self.char_plane[lines, columns]
+        self.base_fg[lines, columns] = self.fg_plane[lines, columns]
+        self.base_bg[lines, columns] = self.bg_plane[lines, columns]
+        self.base_bold[lines, columns] = self.bold_plane[lines, columns]
+        self.frozen[lines, columns] = True
+
+    def thaw(self):
+        """
+        Clears every frozen cell back to the plain background. This must be called before anything is
+        drawn for the frame.
+        """
+
+        lines, columns = np.nonzero(self.frozen)
+        for plane in (self.char_plane, self.base_char):
+            plane[lines, columns] = " "
+        for plane in (self.fg_plane, self.bg_plane, self.base_fg, self.base_bg):
+            plane[lines, columns] = self.bg
+        for plane in (self.bold_plane, self.base_bold):
+            plane[lines, columns] = False
+        self.frozen[lines, columns] = False
+        self.redraw[lines, columns] = True
+
+    def _resize_buffers(self, lines, columns, repaint):
+        """
+        Reallocates the planes of the screen for the new size, copying over the overlapping cells.
+        Added cells are filled with the background, and are to be sent during the next paint, along
+        with every other cell if repaint is set.
+        """
+
+        fills = {
+            "char_plane": " ", "fg_plane": self.bg, "bg_plane": self.bg, "bold_plane": False,
+            "base_char": " ", "base_fg": self.bg, "base_bg": self.bg, "base_bold": False, "frozen": False,
+            "redraw": False, "redraw_past": True, "_candidates": False,
+            "shown": False, "shown_char": " ", "shown_fg": 0, "shown_bg": 0, "shown_bold": False,
+        }
+        kept = (slice(0, min(lines, self.lines)), slice(0, min(columns, self.columns)))
+        for name, fill in fills.items():
+            plane = getattr(self, name)
+            resized = np.empty((lines, columns) + plane.shape[2:], dtype=plane.dtype)
+            resized[...] = fill
+            resized[kept] = plane[kept]
+            setattr(self, name, resized)
+        self.lines, self.columns = lines, columns
+        if repaint:
+            self.shown.fill(False)
+            self.redraw_past.fill(True)
+
+    def _forget_cells(self, cells):
+        """
+        Forget what is displayed in the given cells, as emitted during some earlier paint.
+        """
+
+        lines, columns = cells
+        if len(lines) and (lines.max() >= self.lines or columns.max() >= self.columns):
+            keep = (lines < self.lines) & (columns < self.columns)
+            lines, columns = lines[keep], columns[keep]
+        self.shown[lines, columns] = False
+        self.redraw_past[lines, columns] = True
+
+    def _frame_delta(self):
+        """
+        The changes made by the latest paint, as arrays, along with their size in bytes.
+        """
+
+        lines, columns = self._emitted
+        emitted = (
+            lines, columns,
+            self.shown_char[lines, columns], self.shown_fg[lines, columns],
+            self.shown_bg[lines, columns], self.shown_bold[lines, columns],
+        )
+        return emitted, sum(array.nbytes for array in emitted)
+
+    def _apply_frame_delta(self, emitted):
+        """
+        Applies the changes made by an earlier paint, as returned by _frame_delta.
+        """
+
+        lines, columns, char, fg, bg, bold = emitted
+        self.shown[lines, columns] = True
+        self.shown_char[lines, columns] = char
+        self.shown_fg[lines, columns] = fg
+        self.shown_bg[lines, columns] = bg
+        self.shown_bold[lines, columns] = bold
+        self._emitted = (lines, columns)
+        self.cells_emitted = len(lines)
+        self.redraw_past[...] = self.shown
+
+    def _next_frame(self):
+        """
+        Clears the screenbuffer for the next frame, remembering which cells were just drawn.
+
+        As with TermScreen, only the cells drawn during this frame are cleared. The redraw masks
+        are swapped and reused, instead of being allocated again.
+        """
+
+        lines, columns = np.nonzero(self.redraw)
+        self.char_plane[lines, columns] = self.base_char[lines, columns]
+        self.fg_plane[lines, columns] = self.base_fg[lines, columns]
+        self.bg_plane[lines, columns] = self.base_bg[lines, columns]
+        self.bold_plane[lines, columns] = self.base_bold[lines, columns]
+        self.redraw_past.fill(False)
+        self.redraw, self.redraw_past = self.redraw_past, self.redraw
+
+
+class _ScreenView:
+    """
+    A read-only, dictionary-like view of the planes of a TermScreenArray, keyed by (line, column).
+    Each entry is a tuple of the form (char, fg, bg, bold), like those of TermScreen.screen.
+    """
+
+    def __init__(self, term):
+        self.term = term
+
+    def __contains__(self, key):
+        i, j = key
+        return 0 <= i < self.term.lines and 0 <= j < self.term.columns
+
+    def __getitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        i, j = key
+        return (
+            str(self.term.char_plane[i, j]),
+            tuple(self.term.fg_plane[i, j].tolist()),
+            tuple(self.term.bg_plane[i, j].tolist()),
+            bool(self.term.bold_plane[i, j]),
+        )
@@ -0,0 +1,3 @@
+"""
+Headless benchmarks for drawing and painting frames. Run `python3 -m termanim.bench -h` for options.
+"""
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+from sys import exit, stderr
+from fnmatch import fnmatch
+from argparse import ArgumentParser
+
+from .cases import cases
+from .runner import run, compare, save, load_results
+
+def log(name, result):
+    print(f"{name:32} {result['fps']:9.1f} fps {result['bytes_per_frame']:10.0f} B/frame " + \
+        f"{result['cells_per_frame']:8.0f} cells/frame {result['alloc_kb_per_frame']:9.1f} kB/frame", file=stderr)
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser("Headless benchmarks for termanim")
+    parser.add_argument("patterns", nargs="*", default=["*"], help="run only the cases matching these patterns, e.g. 'sprites/rgb/*'")
+    parser.add_argument("--frames", type=int, default=60, help="frames painted for each case")
+    parser.add_argument("--repeats", type=int, default=3, help="times each case is run, keeping the fastest")
+    parser.add_argument("--sink", choices=["null", "devnull", "pipe"], default="null", help="discard frames, or write them to /dev/null or to a pipe")
+    parser.add_argument("--list", action="store_true", help="list the cases without running them")
+    parser.add_argument("--save", type=str, metavar="FILE", help="save the results as JSON to FILE")
+    parser.add_argument("--baseline", type=str, metavar="FILE", help="compare the results against those saved in FILE")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative change allowed before a case counts as a regression")
+    args = parser.parse_args()
+
+    selected = {name: setup for name, setup in cases().items() if any(fnmatch(name, p) for p in args.patterns)}
+    if args.list:
+        print("\n".join(selected))
+        exit(0)
+
+    baseline = load_results(args.baseline) if args.baseline else None
+    if baseline is not None and baseline["frames"] != args.frames:
+        parser.error(f"the baseline painted {baseline['frames']} frames per case, so use --frames {baseline['frames']}")
+    if baseline is not None and baseline["sink"] != args.sink:
+        parser.error(f"the baseline wrote to {baseline['sink']}, so use --sink {baseline['sink']}")
+    results = run(selected, args.frames, max(args.repeats, 1), args.sink, log)
+    if args.save:
+        save(results, args.save)
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print("regression:", regression, file=stderr)
+        if regressions:
+            exit(1)
+        print("no regressions", file=stderr)
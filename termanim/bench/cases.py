@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+
+from random import seed, choice, randint
+from itertools import product
+
+from ..term import TermScreen, TermScreenRGB, TermThings
+from ..scene import Scene
+from .. import shm, shmRGB, blocks
+try:
+    from ..arrays import TermScreenArray
+    from ..tiles import TermScreenTiled
+    from ..pixels import PixelCanvas
+    from .. import shmPixels
+except ImportError:
+    TermScreenArray = TermScreenTiled = PixelCanvas = None
+
+SIZES = [(24, 80), (60, 200)]
+SPRITE_COUNTS = [1, 8, 32]
+ALPHA_DENSITIES = [0.0, 0.5, 1.0]
+DEPTHS = ["256", "16"]
+LARGE_SIZE = (120, 400)
+LARGE_SPRITE_COUNT = 128
+
+def screens():
+    """
+    The RGB screen classes to benchmark, by name. TermScreenArray is only included if NumPy is installed.
+    """
+
+    classes = {"rgb": TermScreenRGB}
+    if TermScreenArray is not None:
+        classes["array"] = TermScreenArray
+    return classes
+
+def sprites(cls, size, writer, n_sprites, alpha_density):
+    """
+    A synthetic scene of boxes bouncing around the screen. The alpha_density is the fraction of the
+    boxes which are translucent, the rest being opaque.
+
+    Returns the screen along with a function which draws frame n onto it.
+    """
+
+    term = cls(size, writer=writer)
+    boxes = []
+    for k in range(n_sprites):
+        alpha = 0.5 if k < round(alpha_density * n_sprites) else 1.0
+        colour = (37 * k % 256, 91 * k % 256, 173 * k % 256)
+        box = TermThings.box("#", range(0, 6), range(0, 13), fg=(255, 255, 255), bg=colour, alpha=alpha)
+        boxes.append(TermThings.gradient_right(box, bg=(255 - colour[0], 0, colour[2])))
+
+    def draw(n):
+        frame = []
+        for k, box in enumerate(boxes):
+            line = (3 * k + n) % (2 * (term.lines - 6))
+            column = (7 * k + 2 * n) % (2 * (term.columns - 13))
+            line = min(line, 2 * (term.lines - 6) - line)
+            column = min(column, 2 * (term.columns - 13) - column)
+            frame.append(TermThings.translate(box, line, column))
+        term.draw_things(*frame)
+    return term, draw
+
+def log(cls, size, writer, scroll):
+    """
+    A synthetic log view, whose lines of text scroll up by one line every frame under a fixed header.
+    If scroll is set, the screen scrolls the terminal instead of sending every line again.
+    """
+
+    term = cls(size, writer=writer)
+    term.scroll = scroll
+    seed(0)
+    words = ["".join(choice("abcdefghij") for _ in range(randint(2, 8))) for _ in range(64)]
+
+    def draw(n):
+        term.draw_things(TermThings.text(f"log, frame {n}", 0, 0, fg=(255, 255, 0), bold=True))
+        for line in range(1, term.lines):
+            k = n + line
+            text = " ".join(words[(k * 7 + w) % len(words)] for w in range(k % 11 + 1))
+            term.draw_things(TermThings.text(f"{k:6d} {text}"[:term.columns], line, 0, fg=(100 + k * 13 % 156, 200, 200)))
+    return term, draw
+
+def demo_shm(cls, size, writer):
+    """
+    The scene from termanim.shm. The screen class is ignored, since the demo uses named colours.
+    """
+
+    term = TermScreen(size, writer=writer)
+    frames = shm.frames(term, 30)
+    return term, lambda n: term.draw_things(*next(frames))
+
+def demo_shmRGB(cls, size, writer):
+    """
+    The scene from termanim.shmRGB, with its gradient box kept on a static layer.
+    """
+
+    term = cls(size, writer=writer)
+    scene = Scene(term)
+    scene.layer(shmRGB.gradient_box(term))
+    sprites = scene.layer()
+    frames = shmRGB.frames(term, 30)
+
+    def draw(n):
+        sprites.set(*next(frames))
+        scene.draw()
+    return term, draw
+
+def demo_blocks(cls, size, writer, depth="truecolor"):
+    """
+    The scene from termanim.blocks, with its boxes placed the same way every time.
+    """
+
+    seed(0)
+    term = cls(size, wrap=True, writer=writer, depth=depth)
+    frames = blocks.frames(term, 30, blocks.WHITE, 8, 0.9, False)
+    return term, lambda n: term.draw_things(*next(frames))
+
+def demo_shmPixels(cls, size, writer):
+    """
+    The scene from termanim.shmPixels, drawn through a pixel canvas covering the screen.
+    """
+
+    term = cls(size, writer=writer)
+    canvas = PixelCanvas(term)
+    background = shmPixels.sky(canvas)
+    frames = shmPixels.frames(canvas, 30)
+
+    def draw(n):
+        x, y, width, height = next(frames)
+        canvas.blit(background, 0, 0)
+        canvas.fill(y, x, height, width, shmPixels.WHITE, alpha=0.9)
+        canvas.draw()
+    return term, draw
+
+def cases():
+    """
+    Every benchmark case, as a dictionary mapping names to functions which set up the case, given
+    the writer to paint to.
+    """
+
+    all_cases = {}
+    for (name, cls), size in product(screens().items(), SIZES):
+        dims = f"{size[0]}x{size[1]}"
+        for n_sprites, alpha_density in product(SPRITE_COUNTS, ALPHA_DENSITIES):
+            all_cases[f"sprites/{name}/{dims}/n{n_sprites}/a{alpha_density}"] = \
+                lambda writer, cls=cls, size=size, n_sprites=n_sprites, alpha_density=alpha_density: \
+                    sprites(cls, size, writer, n_sprites, alpha_density)
+        all_cases[f"log/{name}/{dims}"] = lambda writer, cls=cls, size=size: log(cls, size, writer, False)
+        all_cases[f"logscroll/{name}/{dims}"] = lambda writer, cls=cls, size=size: log(cls, size, writer, True)
+        all_cases[f"shmRGB/{name}/{dims}"] = lambda writer, cls=cls, size=size: demo_shmRGB(cls, size, writer)
+        all_cases[f"blocks/{name}/{dims}"] = lambda writer, cls=cls, size=size: demo_blocks(cls, size, writer)
+        if PixelCanvas is not None:
+            all_cases[f"shmPixels/{name}/{dims}"] = lambda writer, cls=cls, size=size: demo_shmPixels(cls, size, writer)
+        for depth in DEPTHS:
+            all_cases[f"blocks{depth}/{name}/{dims}"] = \
+                lambda writer, cls=cls, size=size, depth=depth: demo_blocks(cls, size, writer, depth)
+    if TermScreenTiled is not None:
+        dims = f"{LARGE_SIZE[0]}x{LARGE_SIZE[1]}"
+        for name, cls in [("array", TermScreenArray), ("tiled", TermScreenTiled)]:
+            all_cases[f"large/{name}/{dims}/n{LARGE_SPRITE_COUNT}"] = \
+                lambda writer, cls=cls: sprites(cls, LARGE_SIZE, writer, LARGE_SPRITE_COUNT, 1.0)
+    for size in SIZES:
+        all_cases[f"shm/named/{size[0]}x{size[1]}"] = lambda writer, size=size: demo_shm(None, size, writer)
+    return all_cases
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+import os
+import platform
+import tracemalloc
+from time import perf_counter
+from threading import Thread
+from statistics import median
+from json import dump, load
+
+from ..stats import FrameStats
+from ..output import FdWriter, NullWriter
+
+class Output:
+    """
+    Provides the writer which frames are painted to. The null sink discards frames without any system
+    calls, the devnull sink writes them to /dev/null, and the pipe sink writes them to a pipe which
+    is drained by a background thread. The pipe is closest to a real terminal, since writes block
+    when it is full.
+    """
+
+    def __init__(self, sink="null"):
+        self.sink = sink
+
+    def __enter__(self):
+        if self.sink == "null":
+            return NullWriter()
+        if self.sink == "pipe":
+            read_fd, self._fd = os.pipe()
+            self._thread = Thread(target=Output._drain, args=(read_fd,), daemon=True)
+            self._thread.start()
+        else:
+            self._fd = os.open(os.devnull, os.O_WRONLY)
+        return FdWriter(self._fd)
+
+    def _drain(fd):
+        while os.read(fd, 1 << 16):
+            pass
+        os.close(fd)
+
+    def __exit__(self, *args):
+        if self.sink != "null":
+            os.close(self._fd)
+        if self.sink == "pipe":
+            self._thread.join()
+
+
+def close_screen(term):
+    """
+    Frees whatever a screen holds on to, such as the pool of processes and shared memory of a
+    TermScreenTiled, so that it does not linger on into the cases run after it.
+    """
+
+    close = getattr(term, "close", None)
+    if close is not None:
+        close()
+
+def run_case(setup, writer, frames=60, repeats=3, warmup=5, alloc_frames=10):
+    """
+    Runs a single benchmark case, painting to the supplied writer, drawing and painting the supplied number of frames after a few
+    warmup frames. This is repeated, setting up the case afresh each time, and the fastest run is kept.
+    The case is then set up again and a few frames are painted with tracemalloc running, to measure
+    the memory allocated while drawing and painting each frame.
+    """
+
+    elapsed = []
+    for repeat in range(repeats):
+        term, draw = setup(writer)
+        try:
+            emitted = []
+            stats = FrameStats(window=frames, callback=lambda frame: emitted.append(frame["emitted"]))
+            for n in range(warmup):
+                draw(n)
+                term.paint()
+            term.stats = stats
+            t = perf_counter()
+            for n in range(warmup, warmup + frames):
+                draw(n)
+                term.paint()
+            elapsed.append(perf_counter() - t)
+        finally:
+            close_screen(term)
+
+    term, draw = setup(writer)
+    peaks = []
+    tracemalloc.start()
+    try:
+        for n in range(warmup + alloc_frames):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            draw(n)
+            term.paint()
+            if n >= warmup:
+                peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+        close_screen(term)
+
+    return {
+        "fps": frames / min(elapsed),
+        "bytes_per_frame": stats.bytes_written / frames,
+        "cells_per_frame": sum(emitted) / frames,
+        "alloc_kb_per_frame": median(peaks) / 1024 if peaks else 0.0,
+        "p95_ms": 1000 * stats.percentile(95),
+    }
+
+def run(cases, frames=60, repeats=3, sink="null", log=None):
+    """
+    Runs every supplied case, given as a dictionary of names and setup functions, and returns the
+    results along with a description of the machine they were run on.
+    """
+
+    results = {}
+    for name, setup in cases.items():
+        with Output(sink) as writer:
+            results[name] = run_case(setup, writer, frames, repeats)
+        if log is not None:
+            log(name, results[name])
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "frames": frames,
+        "sink": sink,
+        "results": results,
+    }
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Compares results against a baseline, returning a list of regressions. A case regresses if its
+    frame-rate falls, or if its bytes or allocations per frame grow, by more than the tolerance.
+    Cases missing from either side are ignored. Both must have painted the same number of frames,
+    since the frames painted differ otherwise.
+    """
+
+    if results["frames"] != baseline["frames"]:
+        raise ValueError(f"baseline painted {baseline['frames']} frames per case, not {results['frames']}")
+    regressions = []
+    checks = [("fps", -1), ("bytes_per_frame", 1), ("alloc_kb_per_frame", 1)]
+    for name, result in results["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        for metric, sign in checks:
+            old, new = base[metric], result[metric]
+            if sign * (new - old) > tolerance * old:
+                regressions.append(f"{name}: {metric} {old:.1f} -> {new:.1f}")
+    return regressions
+
+def save(results, path):
+    with open(path, "w") as f:
+        dump(results, f, indent=2, sort_keys=True)
+
+def load_results(path):
+    with open(path) as f:
+        return load(f)
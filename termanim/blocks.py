@@ -1,13 +1,18 @@
 #!/usr/bin/env python3
 
-from time import time, sleep
 from random import random, randint, choice
 from math import cos, pi
 from argparse import ArgumentParser
+from sys import stderr
 
 from .ansi import ANSICodes
 from .term import TermScreenRGB, TermThings
 from .anim import Effects
+from .clock import FrameClock
+from .output import ThreadedWriter
+from .stats import FrameStats
+from .record import Recorder
+from .governor import Governor
 
 WHITE = (255, 255, 255)
 
@@ -29,7 +34,6 @@ def fade_in_move(fps, alpha, delay, speed):
         Effects.forever(),
     ])
     def animate(thing):
-        thing = list(thing)
         dy, dx = 0, 0
         for frame in fade_in(thing):
             dy += speed[0] / fps
@@ -42,10 +46,10 @@ def pulse(fps, period, alpha_min=0.0, alpha_max=1.0):
     fade = Effects.alpha(fps, period, alphafunc=alphafunc)
     return Effects.cycle(fade)
 
-def main(fps, fg, bg, n_boxes, box_alpha, no_grad):
-    term = TermScreenRGB(wrap=True, bg=bg)
-
-    period = 1 / fps
+def frames(term, fps, fg, n_boxes, box_alpha, no_grad):
+    """
+    Streams the objects to be drawn onto the screen during each frame.
+    """
 
     boxes = [TermThings.translate(random_box(), randint(0, term.lines - 5), randint(0, term.columns - 10)) for i in range(n_boxes)]
     if not no_grad:
@@ -61,23 +65,37 @@ def main(fps, fg, bg, n_boxes, box_alpha, no_grad):
         pulse(fps, 2.0, alpha_min=0.5)
     ])
 
-    frames = zip(
+    return zip(
         *(fade_in_move(fps, box_alpha, 6 * random(), speed)(box) for box, speed in zip(boxes, speeds)),
         fade_pulse(hello)
     )
 
-    # Start the animation loop.
-    t_0 = time()
-    for frame in frames:
-        term.draw_things(*frame)
-        term.paint()
-        
-        # Update timings, sleep for just the right amount of time.
-        t = time()
-        t_next = t_0 + period
-        if t < t_next:
-            sleep(t_next - t)
-        t_0 = time()
+def main(fps, fg, bg, n_boxes, box_alpha, no_grad, threaded, stats=None, show_stats=False, record=None, depth="truecolor",
+        latency=None):
+    writer = ThreadedWriter() if threaded else None
+    term = TermScreenRGB(wrap=True, bg=bg, writer=writer, stats=stats, depth=depth)
+    # Record every frame painted to a file, if asked to, while still displaying it.
+    if record is not None:
+        term.writer = Recorder(record, term.writer, (term.lines, term.columns))
+    # Keep the output within what the terminal can carry, if asked to, by skipping frames and lowering
+    # the colour depth.
+    governor = Governor(term, latency) if latency is not None else None
+
+    clock = FrameClock(fps, skip=True)
+
+    # Start the animation loop. The clock waits until each frame is due, skipping frames if we fall behind.
+    try:
+        for frame in clock.run(frames(term, fps, fg, n_boxes, box_alpha, no_grad)):
+            if governor is not None and not governor.ready():
+                continue
+            term.draw_things(*frame)
+            if show_stats:
+                term.draw_things(TermThings.text(stats.report(), term.lines - 1, 0, fg=fg))
+                if governor is not None:
+                    term.draw_things(TermThings.text(governor.report(), term.lines - 2, 0, fg=fg))
+            term.paint()
+    finally:
+        term.writer.close()
 
 
 if __name__ == '__main__':
@@ -88,16 +106,27 @@ if __name__ == '__main__':
     parser.add_argument("--boxes", "-n", type=int, default=8, help="number of boxes")
     parser.add_argument("--box-alpha", type=float, default=0.9, help="opacity of boxes, between 0.0 and 1.0")
     parser.add_argument("--no-grad", action="store_true", help="do not put gradients on the boxes")
+    parser.add_argument("--depth", choices=["truecolor", "256", "16"], default="truecolor", help="colour depth of the terminal")
+    parser.add_argument("--latency", type=float, metavar="SECONDS", help="skip frames and lower the colour depth to keep the terminal within SECONDS of the animation")
+    parser.add_argument("--threaded", action="store_true", help="write frames to the terminal from a background thread")
+    parser.add_argument("--stats", action="store_true", help="show the frame-rate, frame times and output rate")
+    parser.add_argument("--trace", type=str, metavar="FILE", help="dump a Chrome trace of every frame to FILE")
+    parser.add_argument("--record", type=str, metavar="FILE", help="record every frame to FILE, to be played with termanim.record")
     args = parser.parse_args()
     fg = hex_to_rgb(int(args.fg, 16))
     bg = hex_to_rgb(int(args.bg, 16))
     n_boxes = max(args.boxes, 0)
     box_alpha = min(max(args.box_alpha, 0.0), 1.0)
     fps = max(args.fps, 0)
+    stats = FrameStats(trace=args.trace is not None) if args.stats or args.trace else None
     try:
         print(ANSICodes.HIDE_CURSOR)
-        main(fps, fg, bg, n_boxes, box_alpha, args.no_grad)
+        main(fps, fg, bg, n_boxes, box_alpha, args.no_grad, args.threaded, stats, args.stats, args.record, args.depth, args.latency)
     except KeyboardInterrupt:
         pass
     finally:
         print(ANSICodes.CLEAR + ANSICodes.HOME + ANSICodes.SHOW_CURSOR, end="")
+        if args.stats:
+            print(stats.report(), file=stderr)
+        if args.trace:
+            stats.dump_trace(args.trace)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+from collections import OrderedDict
+
+class FrameCache:
+    """
+    A cache of animation frames, bounded by an approximate memory budget in bytes.
+
+    Every entry is stored along with its size. When adding an entry would exceed the budget, the least
+    recently used entries are evicted to make room. Entries larger than the whole budget are not stored.
+    """
+
+    def __init__(self, budget=8 * 2**20):
+        self.budget = budget
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """
+        Returns the entry stored under key, or None if there is no such entry.
+        """
+
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value, size):
+        """
+        Stores an entry of the supplied size under key, evicting older entries if needed.
+        """
+
+        if key in self._entries:
+            self.size -= self._entries.pop(key)[1]
+        if size > self.budget:
+            return
+        while self.size + size > self.budget:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.size -= evicted
+            self.evictions += 1
+        self._entries[key] = (value, size)
+        self.size += size
+
+    def clear(self):
+        """
+        Removes every entry.
+        """
+
+        self._entries.clear()
+        self.size = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+from time import perf_counter, sleep
+from collections import deque
+from math import sqrt
+
+class FrameClock:
+    """
+    A clock which paces an animation loop at a steady frame-rate.
+
+    Frame n is due at the absolute time t_0 + n / fps, where t_0 is the time at which the first
+    frame was drawn. Time spent drawing a frame is therefore never added on to the next one, and the
+    animation does not drift. If skip is set, frames which are already more than a whole period late
+    when they come up are skipped, so that the animation keeps up with real time instead of slowing down.
+
+    An animation loop is intended to be of the following form.
+    >>> clock = FrameClock(fps, skip=True)
+    >>> for frame in clock.run(frames):
+    >>>     term.draw_things(*frame)
+    >>>     term.paint()
+
+    The achieved frame-rate and the jitter (the standard deviation of how late frames were started)
+    are measured over the last window frames drawn.
+    """
+
+    def __init__(self, fps, skip=False, window=120):
+        self.fps = fps
+        self.period = 1 / fps if fps else 0.0
+        self.skip = skip
+        self.t_0 = None
+        self.frames_drawn = 0
+        self.frames_skipped = 0
+        self._times = deque(maxlen=window)
+        self._lateness = deque(maxlen=window)
+
+    def deadline(self, n):
+        """
+        The time at which frame n is due.
+        """
+
+        return self.t_0 + n * self.period
+
+    def wait(self, n):
+        """
+        Waits until frame n is due. Returns False if the frame should be skipped instead of drawn.
+        """
+
+        t = perf_counter()
+        if self.t_0 is None:
+            self.t_0 = t
+        t_next = self.deadline(n)
+        if t < t_next:
+            sleep(t_next - t)
+            t = perf_counter()
+        elif self.skip and t - t_next > self.period > 0:
+            self.frames_skipped += 1
+            return False
+        self.frames_drawn += 1
+        self._times.append(t)
+        self._lateness.append(t - t_next)
+        return True
+
+    def run(self, frames):
+        """
+        Streams the supplied frames, each one once it is due. Frames which are skipped are still
+        taken from the supplied iterable, but are not streamed.
+        """
+
+        for n, frame in enumerate(frames):
+            if self.wait(n):
+                yield frame
+
+    def achieved_fps(self):
+        """
+        The frame-rate actually achieved over the last few frames drawn.
+        """
+
+        if len(self._times) < 2 or self._times[-1] == self._times[0]:
+            return 0.0
+        return (len(self._times) - 1) / (self._times[-1] - self._times[0])
+
+    def jitter(self):
+        """
+        The standard deviation of how late the last few frames were started, in seconds.
+        """
+
+        if not self._lateness:
+            return 0.0
+        mean = sum(self._lateness) / len(self._lateness)
+        return sqrt(sum((late - mean)**2 for late in self._lateness) / len(self._lateness))
+
+    def report(self):
+        """
+        A short summary of the achieved frame-rate, jitter and skipped frames.
+        """
+
+        return f"{self.achieved_fps():.1f} fps, jitter {1000 * self.jitter():.2f} ms, " + \
+            f"{self.frames_skipped} of {self.frames_drawn + self.frames_skipped} frames skipped"
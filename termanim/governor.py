@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+
+from time import perf_counter
+from collections import deque
+
+from .output import Writer
+
+# The colour depths a governor steps through, from the most to the fewest bytes per colour.
+DEPTHS = ["truecolor", "256", "16"]
+# The time a write must be held back for, in seconds, to show that the buffers of the link are full.
+BLOCKED = 0.001
+# The number of writes in a row which must be held back, before the link is taken to be saturated.
+SATURATED = 3
+# The fraction of the estimated capacity of the link left unused, to allow for errors in the estimate.
+HEADROOM = 0.2
+# The rate at which the estimated capacity of the link is raised after each frame written without
+# saturating it, so that the governor notices when the link speeds up again.
+PROBE = 0.001
+
+class Governor(Writer):
+    """
+    Keeps the output of a screen within what its terminal can carry, so that what is displayed lags
+    behind what was painted by no more than latency seconds, as over a slow SSH connection.
+
+    The governor stands in for the writer of the screen, passing frames on to it and timing every
+    write. Writes which are held back by full buffers show that the link is saturated, in which case
+    the rate at which the last few frames were taken in is the capacity of the link. The bytes still
+    in flight are then estimated from the bytes written and the capacity, and frames are skipped
+    while the next frame would take longer than latency seconds to arrive. Skipping frames lowers the
+    frame-rate, and since each frame holds every cell which changed since the last one painted,
+    nothing drawn is lost. Until the link is first saturated, nothing is skipped.
+
+    If fewer than min_fps frames are painted, the colour depth of the screen is lowered, from 24 bit
+    to 256 colours and then 16 colours, since shorter colour codes need fewer bytes. The depth is
+    raised again, up to the depth the screen started with, once no frames have been skipped for a
+    while and the link has room to spare. Only screens with a set_depth method have their depth
+    changed.
+
+    An animation loop is intended to be of the following form.
+    >>> governor = Governor(term, latency=0.25)
+    >>> for frame in clock.run(frames):
+    >>>     if not governor.ready():
+    >>>         continue
+    >>>     term.draw_things(*frame)
+    >>>     term.paint()
+    """
+
+    def __init__(self, term, latency=0.25, min_fps=10, window=30, capacity=None):
+        """
+        Takes over the writer of the supplied screen. If the capacity of the link is known beforehand,
+        in bytes per second, it can be supplied so that the governor need not wait for the link to be
+        saturated. Otherwise, links with deep buffers may fall behind by as much as their buffers hold
+        before the governor first steps in.
+        """
+
+        self.term = term
+        self.writer = term.writer
+        term.writer = self
+        self.latency = latency
+        self.min_fps = min_fps
+        self.capacity = capacity
+        self.in_flight = 0.0
+        self.frames_painted = 0
+        self.frames_skipped = 0
+        self._writes = deque(maxlen=window)
+        self._frames = deque(maxlen=window)
+        self._frame_bytes = 0.0
+        self._bytes_written = 0
+        self._t_first = None
+        self._t_flight = None
+        self._t_depth = perf_counter()
+        depth = getattr(term, "depth", None)
+        self._depths = DEPTHS[DEPTHS.index(depth):] if depth in DEPTHS else []
+        self._depth = 0
+
+    def _drain(self, t):
+        """
+        Takes the bytes which the link has carried since the last call out of those in flight. The
+        link is taken to be somewhat slower than estimated, to be on the safe side.
+        """
+
+        if self.capacity is not None and self._t_flight is not None:
+            self.in_flight = max(self.in_flight - (1 - HEADROOM) * self.capacity * (t - self._t_flight), 0.0)
+        self._t_flight = t
+
+    def delay(self):
+        """
+        The estimated time until everything written so far has been carried by the link, in seconds.
+        """
+
+        self._drain(perf_counter())
+        return self.in_flight / ((1 - HEADROOM) * self.capacity) if self.capacity else 0.0
+
+    def ready(self):
+        """
+        Whether the next frame should be drawn and painted. Returns False if the frame should be
+        skipped instead, since it would arrive later than the latency allows.
+        """
+
+        t = perf_counter()
+        self._drain(t)
+        ready = self.capacity is None or self.in_flight + self._frame_bytes <= (1 - HEADROOM) * self.capacity * self.latency
+        if ready:
+            self.frames_painted += 1
+        else:
+            self.frames_skipped += 1
+        self._frames.append((t, ready))
+        self._adapt(t)
+        return ready
+
+    def write(self, data, cells=None):
+        t = perf_counter()
+        if self._t_first is None:
+            self._t_first = t
+        self.writer.write(data, cells)
+        t_end = perf_counter()
+        self._writes.append((t, t_end, len(data)))
+        self._frame_bytes += (len(data) - self._frame_bytes) / 4
+        self._estimate(t_end - t)
+        self._drain(t_end)
+        self.in_flight += len(data)
+        self._bytes_written += len(data)
+
+    def _estimate(self, blocked):
+        """
+        Updates the estimated capacity of the link, in bytes per second, after a write which was held
+        back for the supplied time.
+
+        A write which is held back ends once the buffers of the link have room for it, so the buffers
+        are full when it ends. Between the ends of two such writes, the link must have carried
+        everything written in between, which gives its capacity. Otherwise, the estimate is raised
+        slightly, in case the link has become faster.
+
+        When the link is first found to be saturated, its buffers are taken to hold everything written
+        so far which the link could not yet have carried, since nothing was held back before then.
+        """
+
+        held = []
+        for start, end, nbytes in reversed(self._writes):
+            if end - start <= BLOCKED:
+                break
+            held.append((end, nbytes))
+        if len(held) >= SATURATED:
+            first = self.capacity is None
+            self.capacity = sum(nbytes for _, nbytes in held[:-1]) / (held[0][0] - held[-1][0])
+            t_end = held[0][0]
+            if first:
+                self.in_flight = max(self._bytes_written - self.capacity * (t_end - self._t_first), 0.0)
+            self._t_flight = t_end
+            self.in_flight = max(self.in_flight, self.capacity * blocked)
+        elif self.capacity is not None and blocked <= BLOCKED:
+            self.capacity *= 1 + PROBE
+
+    def painted_fps(self):
+        """
+        The rate at which frames were painted over the last few frames.
+        """
+
+        if len(self._frames) < 2 or self._frames[-1][0] == self._frames[0][0]:
+            return 0.0
+        painted = sum(ready for _, ready in self._frames) - self._frames[0][1]
+        return painted / (self._frames[-1][0] - self._frames[0][0])
+
+    def _adapt(self, t):
+        """
+        Lowers the colour depth of the screen if too few frames are being painted, or raises it if no
+        frames have been skipped and the link has room to spare. The depth is changed at most once
+        per second.
+        """
+
+        if not self._depths or t - self._t_depth < 1.0 or len(self._frames) < self._frames.maxlen:
+            return
+        skipped = not all(ready for _, ready in self._frames)
+        if skipped and self.painted_fps() < self.min_fps and self._depth + 1 < len(self._depths):
+            self._depth += 1
+        elif not skipped and self._depth > 0 and self.delay() < self.latency / 4:
+            self._depth -= 1
+        else:
+            return
+        self.term.set_depth(self._depths[self._depth])
+        self._t_depth = t
+        self._frames.clear()
+
+    def dropped(self):
+        return self.writer.dropped()
+
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        self.writer.close()
+
+    def report(self):
+        """
+        A short summary of the capacity of the link, the delay, the frames skipped and the colour depth.
+        """
+
+        capacity = f"{self.capacity / 1000:.1f} kB/s" if self.capacity is not None else "unsaturated"
+        depth = f", depth {self._depths[self._depth]}" if self._depths else ""
+        return f"link {capacity}, delay {1000 * self.delay():.0f} ms, " + \
+            f"{self.frames_skipped} of {self.frames_painted + self.frames_skipped} frames skipped{depth}"
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+
+from os import write
+from select import select
+from threading import Thread, Condition
+from collections import deque
+
+def write_all(fd, data):
+    """
+    Writes all of the supplied bytes to a file descriptor. Partial writes are continued until
+    everything is written, waiting for the file descriptor to become writable if it is non-blocking.
+    """
+
+    view = memoryview(data)
+    while view:
+        try:
+            n = write(fd, view)
+        except BlockingIOError:
+            select([], [fd], [])
+            continue
+        view = view[n:]
+
+
+class Writer:
+    """
+    An output sink for the encoded frames of a screen.
+
+    A writer takes each frame as bytes, along with the cells it contains, through its write method.
+    Writers which may drop frames hand the cells of dropped frames back through the dropped method.
+    This base class writes nothing, and subclasses override write.
+    """
+
+    def write(self, data, cells=None):
+        """
+        Writes a frame of encoded bytes.
+        """
+
+    def dropped(self):
+        """
+        Returns the cells of the frames dropped since the last call, as a list with one entry per frame.
+        """
+
+        return []
+
+    def flush(self):
+        """
+        Waits until everything written so far has reached its destination.
+        """
+
+    def close(self):
+        """
+        Flushes the writer, and releases anything it holds.
+        """
+
+        self.flush()
+
+
+class FdWriter(Writer):
+    """
+    Writes frames straight to a file descriptor, such as that of a terminal, pipe, pty or socket.
+    This is what screens use by default, with the standard output.
+    """
+
+    def __init__(self, fd=1):
+        self.fd = fd
+
+    def write(self, data, cells=None):
+        write_all(self.fd, data)
+
+
+class FileWriter(Writer):
+    """
+    Writes frames to a binary file object, such as an open file or an io.BytesIO.
+    """
+
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, data, cells=None):
+        self.file.write(data)
+
+    def flush(self):
+        self.file.flush()
+
+
+class BufferWriter(Writer):
+    """
+    Collects frames in memory, in a single growing bytearray. The buffer method gives a memoryview
+    of everything written so far, without copying it.
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data, cells=None):
+        self.data += data
+
+    def buffer(self):
+        """
+        A memoryview of everything written since the writer was created or last cleared. The writer
+        must not be written to while the view is held.
+        """
+
+        return memoryview(self.data)
+
+    def clear(self):
+        """
+        Discards everything written so far.
+        """
+
+        del self.data[:]
+
+
+class NullWriter(Writer):
+    """
+    Discards every frame, counting the frames and bytes written. Useful for rendering offscreen, for
+    example to measure how fast frames can be drawn and encoded.
+    """
+
+    def __init__(self):
+        self.frames_written = 0
+        self.bytes_written = 0
+
+    def write(self, data, cells=None):
+        self.frames_written += 1
+        self.bytes_written += len(data)
+
+
+class BatchWriter(Writer):
+    """
+    Gathers the frames of one or more screens, and passes them on to another writer as a single frame
+    once flushed. Several screens sharing a BatchWriter are therefore painted with a single write.
+    Since the cells of each frame are not kept, the writer passed on to should not drop frames.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self._frames = []
+
+    def write(self, data, cells=None):
+        self._frames.append(data)
+
+    def flush(self):
+        if self._frames:
+            self.writer.write(b"".join(self._frames))
+            self._frames = []
+        self.writer.flush()
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+class ThreadedWriter(Writer):
+    """
+    Writes encoded frames to a file descriptor from a background thread, so that drawing the next
+    frame can overlap with writing the previous one.
+
+    Frames are passed through a queue holding at most maxsize frames. Whenever the thread is free,
+    it takes every waiting frame and writes them together, so frames which pile up behind a slow
+    terminal are coalesced into a single write. When the queue is full, new frames wait for room, so
+    that drawing is held back to the speed of the terminal.
+
+    If drop is set, new frames never wait. Instead, the oldest waiting frames are dropped to make room.
+    Since frames only hold the cells which changed, each frame is written along with the cells it
+    contains, and the cells of dropped frames are handed back through the dropped method so that the
+    screen can send them again during its next paint. When stopping an animation, flush the writer
+    and paint the final frame once more, so that no dropped cells are left behind.
+    """
+
+    def __init__(self, fd=1, maxsize=2, drop=False):
+        self.fd = fd
+        self.maxsize = maxsize
+        self.drop = drop
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.writes = 0
+        self._pending = deque()
+        self._dropped = []
+        self._busy = False
+        self._closed = False
+        self._error = None
+        self._condition = Condition()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, data, cells=None):
+        """
+        Queues a frame of encoded bytes to be written, along with the cells it contains.
+        """
+
+        with self._condition:
+            if self._error is not None:
+                raise self._error
+            if self._closed:
+                raise ValueError("write to closed ThreadedWriter")
+            if self.drop:
+                while len(self._pending) >= self.maxsize:
+                    _, dropped = self._pending.popleft()
+                    self._dropped.append(dropped)
+                    self.frames_dropped += 1
+            else:
+                self._condition.wait_for(lambda: len(self._pending) < self.maxsize or self._error is not None)
+                if self._error is not None:
+                    raise self._error
+            self._pending.append((data, cells))
+            self._condition.notify_all()
+
+    def dropped(self):
+        """
+        Returns the cells of the frames dropped since the last call, as a list with one entry per frame.
+        """
+
+        with self._condition:
+            dropped, self._dropped = self._dropped, []
+        return dropped
+
+    def _run(self):
+        """
+        Writes waiting frames until the writer is closed.
+        """
+
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                frames = list(self._pending)
+                self._pending.clear()
+                self._busy = True
+                self._condition.notify_all()
+            try:
+                write_all(self.fd, b"".join(data for data, _ in frames))
+            except OSError as error:
+                with self._condition:
+                    self._error = error
+                    self._busy = False
+                    self._condition.notify_all()
+                return
+            with self._condition:
+                self.frames_written += len(frames)
+                self.writes += 1
+                self._busy = False
+                self._condition.notify_all()
+
+    def flush(self):
+        """
+        Waits until every queued frame has been written.
+        """
+
+        with self._condition:
+            self._condition.wait_for(lambda: not (self._pending or self._busy) or self._error is not None)
+
+    def close(self):
+        """
+        Writes every queued frame, and stops the background thread.
+        """
+
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+from array import array
+from itertools import product
+
+from .ansi import ANSICodes
+
+# The default colours of the 16 basic colours in xterm, in the order of ANSICodes.FG_COLORS.
+XTERM_16 = [
+    (0, 0, 0), (205, 0, 0), (0, 205, 0), (205, 205, 0),
+    (0, 0, 238), (205, 0, 205), (0, 205, 205), (229, 229, 229),
+    (127, 127, 127), (255, 0, 0), (0, 255, 0), (255, 255, 0),
+    (92, 92, 255), (255, 0, 255), (0, 255, 255), (255, 255, 255),
+]
+CUBE_LEVELS = [0, 95, 135, 175, 215, 255]
+GREY_LEVELS = [8 + 10 * k for k in range(24)]
+WEIGHTS = (2, 4, 3)
+
+class Palette:
+    """
+    A palette of colours which a terminal can show, for terminals without 24 bit colour.
+
+    RGB colours are quantized to the nearest colour of the palette through a precomputed lookup table,
+    which covers a 32x32x32 cube of colours by keeping the top 5 bits of each component. Distances
+    between colours are weighted towards green, which the eye is most sensitive to.
+
+    The "256" palette is made up of the 6x6x6 colour cube and 24 shades of grey of 256 colour terminals,
+    leaving out the 16 basic colours whose appearance varies between terminals. The "16" palette is
+    made up of the 16 basic colours, as shown by xterm.
+    """
+
+    _palettes = {}
+
+    def __init__(self, depth):
+        if depth == "256":
+            self.colours = [tuple(c) for c in product(CUBE_LEVELS, repeat=3)] + [(g, g, g) for g in GREY_LEVELS]
+            self.lut = Palette._lut_256(self.colours)
+            fg_codes = [ANSICodes.FG_256.format(16 + k) for k in range(len(self.colours))]
+            bg_codes = [ANSICodes.BG_256.format(16 + k) for k in range(len(self.colours))]
+        elif depth == "16":
+            self.colours = XTERM_16
+            self.lut = Palette._lut_nearest(self.colours)
+            fg_codes = list(ANSICodes.FG_COLORS.values())
+            bg_codes = list(ANSICodes.BG_COLORS.values())
+        else:
+            raise ValueError(f"unknown colour depth {depth!r}")
+        self.depth = depth
+        self.fg_codes = dict(zip(self.colours, fg_codes))
+        self.bg_codes = dict(zip(self.colours, bg_codes))
+
+    def of(depth):
+        """
+        The palette for a colour depth of "256" or "16". Palettes are only built once.
+        """
+
+        if depth not in Palette._palettes:
+            Palette._palettes[depth] = Palette(depth)
+        return Palette._palettes[depth]
+
+    def quantize(self, rgb):
+        """
+        The colour of the palette nearest to an RGB colour, whose components may be fractional.
+        """
+
+        r, g, b = rgb
+        return self.colours[self.lut[(int(r) >> 3) << 10 | (int(g) >> 3) << 5 | (int(b) >> 3)]]
+
+    def _centres():
+        """
+        The colour at the centre of each cell of the lookup table, along each axis.
+        """
+
+        return [(k << 3) + 4 for k in range(32)]
+
+    def _distance(c1, c2):
+        return sum(w * (x1 - x2)**2 for w, x1, x2 in zip(WEIGHTS, c1, c2))
+
+    def _lut_nearest(colours):
+        """
+        A lookup table found by comparing every cell against every colour. The weighted distances
+        along each axis are added up, one axis at a time.
+        """
+
+        axes = [
+            [[w * (x - colour[i])**2 for colour in colours] for x in Palette._centres()]
+            for i, w in enumerate(WEIGHTS)
+        ]
+        lut = array("B")
+        for reds in axes[0]:
+            for greens in axes[1]:
+                partial = [r + g for r, g in zip(reds, greens)]
+                for blues in axes[2]:
+                    distances = [rg + b for rg, b in zip(partial, blues)]
+                    lut.append(distances.index(min(distances)))
+        return lut
+
+    def _lut_256(colours):
+        """
+        A lookup table for the 256 colour palette. The nearest colour of the cube is found one axis
+        at a time, and compared against the nearest grey.
+        """
+
+        nearest_level = [min(range(6), key=lambda k: abs(CUBE_LEVELS[k] - x)) for x in Palette._centres()]
+        lut = array("B")
+        for r, g, b in product(range(32), repeat=3):
+            rgb = tuple((x << 3) + 4 for x in (r, g, b))
+            cube = 36 * nearest_level[r] + 6 * nearest_level[g] + nearest_level[b]
+            mean = sum(w * x for w, x in zip(WEIGHTS, rgb)) / sum(WEIGHTS)
+            grey = 216 + min(max(round((mean - GREY_LEVELS[0]) / 10), 0), 23)
+            if Palette._distance(rgb, colours[grey]) < Palette._distance(rgb, colours[cube]):
+                lut.append(grey)
+            else:
+                lut.append(cube)
+        return lut
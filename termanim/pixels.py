@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+from math import floor, ceil
+import numpy as np
+
+from .term import Sprite
+from .arrays import TermScreenArray
+
+# The upper half block, whose foreground colour shows the top pixel of a cell and whose background
+# colour shows the bottom pixel.
+HALF_BLOCK = "▀"
+
+class PixelCanvas:
+    """
+    A canvas of RGB pixels, drawn onto a screen with two pixels to each cell.
+
+    The pixels are kept in a single array with one row for each half of a line, so the canvas has
+    twice as many rows of pixels as it has lines. Each cell is drawn as an upper half block, whose
+    foreground colour is its top pixel and whose background colour is its bottom pixel. Cells whose
+    two pixels are the same colour are drawn as blanks instead, which need no foreground colour.
+
+    Shapes can be filled in at fractional coordinates, in which case the pixels along their edges are
+    blended in proportion to how much of them is covered. Things can therefore move by less than a
+    pixel from one frame to the next, across as well as down the screen.
+
+    On a TermScreenArray the pixels are pasted straight onto the planes of the screenbuffer. On other
+    RGB screens they are drawn as a sprite, which is much slower. Either way, only the cells which
+    changed since the last paint are sent to the terminal.
+    """
+
+    def __init__(self, term, size=None, position=(0, 0), bg=None):
+        """
+        Creates a canvas of the supplied size in lines and columns, with its top left corner at the
+        supplied position on the screen. By default, the canvas covers the rest of the screen and is
+        filled with the background colour of the screen.
+        """
+
+        line, column = position
+        lines, columns = size if size is not None else (term.lines - line, term.columns - column)
+        self.term = term
+        self.position = position
+        self.bg = bg if bg is not None else term.bg
+        self.height, self.width = 2 * lines, columns
+        self.pixels = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        self.pixels[...] = self.bg
+        self._sprite = None
+
+    def clear(self, colour=None):
+        """
+        Fills every pixel with the supplied colour, or with the background colour of the canvas.
+        """
+
+        self.pixels[...] = colour if colour is not None else self.bg
+
+    def _clip(self, y, x, height, width):
+        """
+        Clips a block of pixels to the canvas. Returns the slices of the canvas and of the block which
+        overlap, or None if they do not.
+        """
+
+        top, left = max(y, 0), max(x, 0)
+        bottom, right = min(y + height, self.height), min(x + width, self.width)
+        if top >= bottom or left >= right:
+            return None
+        return (slice(top, bottom), slice(left, right)), (slice(top - y, bottom - y), slice(left - x, right - x))
+
+    def _coverage(start, stop):
+        """
+        The first pixel touched by the span from start to stop, along with the fraction of each pixel
+        touched which lies within the span.
+        """
+
+        first, last = floor(start), ceil(stop)
+        edges = np.arange(first, last + 1, dtype=np.float32)
+        return first, np.clip(np.minimum(edges[1:], stop) - np.maximum(edges[:-1], start), 0.0, 1.0)
+
+    def fill(self, y, x, height, width, colour, alpha=1.0):
+        """
+        Fills a rectangle of pixels with a colour, blended in with the supplied alpha transparency. The
+        top left corner and size of the rectangle are given in pixels, and may be fractional.
+        """
+
+        top, rows = PixelCanvas._coverage(y, y + height)
+        left, columns = PixelCanvas._coverage(x, x + width)
+        clipped = self._clip(top, left, len(rows), len(columns))
+        if clipped is None:
+            return
+        region, block = clipped
+        weights = np.outer(rows[block[0]], columns[block[1]]) * alpha
+        if (weights == 1.0).all():
+            self.pixels[region] = colour
+            return
+        pixels = self.pixels[region].astype(np.float32)
+        colour = np.asarray(colour, dtype=np.float32)
+        self.pixels[region] = np.rint(pixels + (colour - pixels) * weights[:, :, None])
+
+    def blit(self, pixels, y, x, alpha=1.0):
+        """
+        Copies a block of pixels onto the canvas, with its top left corner at the supplied pixel. The
+        block is an array of RGB values, or of RGBA values whose last component gives the opacity of
+        each pixel from 0 to 255. The block is blended in with the supplied alpha transparency.
+        """
+
+        clipped = self._clip(y, x, *pixels.shape[:2])
+        if clipped is None:
+            return
+        region, block = clipped
+        pixels = pixels[block]
+        if pixels.shape[2] == 3 and alpha == 1.0:
+            self.pixels[region] = pixels
+            return
+        weights = np.full(pixels.shape[:2], alpha, dtype=np.float32)
+        if pixels.shape[2] == 4:
+            weights *= pixels[:, :, 3] / np.float32(255)
+        base = self.pixels[region].astype(np.float32)
+        self.pixels[region] = np.rint(base + (pixels[:, :, :3] - base) * weights[:, :, None])
+
+    def draw(self):
+        """
+        Draws the canvas onto the screenbuffer of its screen, covering whatever is under it.
+        """
+
+        top, bottom = self.pixels[0::2], self.pixels[1::2]
+        chars = np.where((top == bottom).all(axis=2), " ", HALF_BLOCK)
+        line, column = self.position
+        if isinstance(self.term, TermScreenArray):
+            self.term.paste(line, column, chars, top, bottom)
+            return
+        if self._sprite is None:
+            lines, columns = np.indices(chars.shape)
+            n = chars.size
+            self._sprite = Sprite([HALF_BLOCK] * n, lines.ravel(), columns.ravel(), [None] * n, [None] * n, [False] * n, [1.0] * n)
+        sprite = self._sprite.with_columns(chars=chars.ravel().tolist(), fgs=top.reshape(-1, 3), bgs=bottom.reshape(-1, 3))
+        self.term.draw_things(sprite.translate(line, column))
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+import zlib
+from struct import Struct
+from mmap import mmap, ACCESS_READ
+from time import perf_counter, sleep
+from json import dumps
+from bisect import bisect_right
+from argparse import ArgumentParser
+
+from .output import Writer, FdWriter
+
+MAGIC = b"TMREC\x00\x00\x01"
+INDEX_MAGIC = b"TMINDEX\x00"
+COMPRESSED = 1
+
+HEADER = Struct("<8sHHH")
+ENTRY = Struct("<dQII")
+FOOTER = Struct("<QQ8s")
+
+class Recorder(Writer):
+    """
+    Records the encoded frames painted by a screen to a file, along with the time at which each one
+    was painted. Frames can also be passed on to another writer, so that an animation is recorded
+    while it is being displayed.
+
+    A recording holds a header, followed by the frames one after the other, followed by an index
+    giving the time, position and length of each frame. If compress is set, each frame is compressed
+    on its own with zlib, so that any frame can still be found without reading the ones before it.
+    The size of the screen can be stored in the header, for exporting to other formats. The index is
+    only written once the recorder is closed.
+    """
+
+    def __init__(self, path, writer=None, size=(0, 0), compress=False):
+        self.writer = writer
+        self.compress = compress
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, COMPRESSED if compress else 0, *size))
+        self._offset = HEADER.size
+        self._index = bytearray()
+        self._frames = 0
+        self._t_0 = None
+
+    def write(self, data, cells=None):
+        t = perf_counter()
+        if self._t_0 is None:
+            self._t_0 = t
+        stored = zlib.compress(data) if self.compress else data
+        self._file.write(stored)
+        self._index += ENTRY.pack(t - self._t_0, self._offset, len(stored), len(data))
+        self._offset += len(stored)
+        self._frames += 1
+        if self.writer is not None:
+            self.writer.write(data, cells)
+
+    def dropped(self):
+        return self.writer.dropped() if self.writer is not None else []
+
+    def flush(self):
+        self._file.flush()
+        if self.writer is not None:
+            self.writer.flush()
+
+    def close(self):
+        """
+        Writes the index and closes the recording, along with the writer frames are passed on to.
+        """
+
+        if self._file.closed:
+            return
+        self._file.write(self._index)
+        self._file.write(FOOTER.pack(self._offset, self._frames, INDEX_MAGIC))
+        self._file.close()
+        if self.writer is not None:
+            self.writer.close()
+
+
+class Recording:
+    """
+    A recording made by a Recorder, read through a memory map.
+
+    Frames are looked up through the index, so playing a recording reads nothing but the frames
+    themselves. Uncompressed frames are returned as memoryviews into the map, without being copied,
+    and stay valid after the recording is closed for as long as they are held.
+    Since each frame only holds the cells which changed, frames must be written out in order from the
+    first one to reproduce what was on screen.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap(f.fileno(), 0, access=ACCESS_READ)
+        magic, flags, self.lines, self.columns = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a termanim recording")
+        self.compressed = bool(flags & COMPRESSED)
+        index_offset, frames, index_magic = FOOTER.unpack_from(self._map, len(self._map) - FOOTER.size)
+        if index_magic != INDEX_MAGIC:
+            raise ValueError(f"{path} has no index, since its recorder was not closed")
+        entries = list(ENTRY.iter_unpack(self._map[index_offset:index_offset + frames * ENTRY.size]))
+        self.times = [entry[0] for entry in entries]
+        self._spans = [(entry[1], entry[2]) for entry in entries]
+        self._view = memoryview(self._map)
+
+    def __len__(self):
+        return len(self.times)
+
+    def __getitem__(self, n):
+        offset, length = self._spans[n]
+        data = self._view[offset:offset + length]
+        return zlib.decompress(data) if self.compressed else data
+
+    def duration(self):
+        """
+        The time between the first and last frames, in seconds.
+        """
+
+        return self.times[-1] if self.times else 0.0
+
+    def play(self, writer=None, speed=1.0, start=0.0):
+        """
+        Writes the frames out at their original pace, scaled by speed, starting from the given time in
+        seconds. The frames before the starting point are written all at once, so that the screen is
+        complete. Frames which fall behind are joined together and written at once, instead of being
+        dropped.
+        """
+
+        writer = writer if writer is not None else FdWriter(1)
+        n = bisect_right(self.times, start)
+        if n:
+            writer.write(b"".join(self[k] for k in range(n)))
+        t_0 = perf_counter() - start / speed
+        while n < len(self):
+            t = perf_counter()
+            t_next = t_0 + self.times[n] / speed
+            if t < t_next:
+                sleep(t_next - t)
+                t = perf_counter()
+            due = bisect_right(self.times, (t - t_0) * speed, n + 1)
+            writer.write(self[n] if due == n + 1 else b"".join(self[k] for k in range(n, due)))
+            n = due
+        writer.flush()
+
+    def to_asciicast(self, path, size=None):
+        """
+        Exports the recording to a file in the asciicast v2 format, as played by asciinema. The size of
+        the terminal defaults to the one stored in the recording.
+        """
+
+        lines, columns = size if size is not None else (self.lines, self.columns)
+        with open(path, "w") as f:
+            f.write(dumps({"version": 2, "width": columns, "height": lines}) + "\n")
+            for n, t in enumerate(self.times):
+                f.write(dumps([round(t, 6), "o", bytes(self[n]).decode("utf-8")]) + "\n")
+
+    def close(self):
+        """
+        Closes the recording. Frames still held as memoryviews keep the memory map open until they
+        are dropped, after which it is closed along with them.
+        """
+
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+        self._map = None
+
+
+if __name__ == '__main__':
+    from .ansi import ANSICodes
+
+    parser = ArgumentParser("Play a termanim recording")
+    parser.add_argument("path", type=str, help="recording to play")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed, relative to the original")
+    parser.add_argument("--start", type=float, default=0.0, help="time in seconds to start playing from")
+    parser.add_argument("--asciicast", type=str, metavar="FILE", help="export to FILE in the asciicast v2 format instead of playing")
+    args = parser.parse_args()
+    recording = Recording(args.path)
+    if args.asciicast:
+        recording.to_asciicast(args.asciicast)
+    else:
+        try:
+            print(ANSICodes.HIDE_CURSOR + ANSICodes.CLEAR, end="", flush=True)
+            recording.play(speed=args.speed, start=args.start)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            print(ANSICodes.SHOW_CURSOR)
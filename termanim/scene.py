@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+class Layer:
+    """
+    An ordered group of drawable objects within a Scene.
+
+    A layer is dirty whenever its contents have been changed since it was last drawn.
+    """
+
+    def __init__(self, *things):
+        self.things = things
+        self.dirty = True
+
+    def set(self, *things):
+        """
+        Replaces the contents of the layer, marking it as dirty.
+        """
+
+        self.things = things
+        self.dirty = True
+
+
+class Scene:
+    """
+    A stack of layers drawn onto a screen, from the bottom up.
+
+    The unchanged layers at the bottom of the stack are drawn once and frozen into the background of
+    the screen (see TermScreen.freeze), so that their composite is kept from one frame to the next
+    instead of being blended again. Only the cells covered by the layers above them are reset and
+    blended again each frame. Changing a frozen layer thaws the background, and the layers below it
+    are drawn and frozen once more.
+
+    An animation loop is intended to be of the following form.
+    >>> scene = Scene(term)
+    >>> scene.layer(background)
+    >>> sprites = scene.layer()
+
+    >>> for frame in clock.run(frames):
+    >>>     sprites.set(*frame)
+    >>>     scene.draw()
+    >>>     term.paint()
+
+    Layers which are set every frame are always dirty, and are never frozen.
+    """
+
+    def __init__(self, term):
+        self.term = term
+        self.layers = []
+        self.frozen = 0
+        self._size = None
+
+    def layer(self, *things):
+        """
+        Adds a new layer on top of the others, holding the supplied objects.
+        """
+
+        layer = Layer(*things)
+        self.layers.append(layer)
+        return layer
+
+    def draw(self):
+        """
+        Draws the scene onto the screenbuffer. This must be called before anything else is drawn
+        for the frame.
+        """
+
+        clean = 0
+        while clean < len(self.layers) and not self.layers[clean].dirty:
+            clean += 1
+        size = (self.term.lines, self.term.columns)
+        if clean < self.frozen or size != self._size:
+            self.term.thaw()
+            self.frozen = 0
+        if clean > self.frozen:
+            for layer in self.layers[self.frozen:clean]:
+                self.term.draw_things(*layer.things)
+            self.term.freeze()
+            self.frozen = clean
+        self._size = size
+        for layer in self.layers[clean:]:
+            self.term.draw_things(*layer.things)
+            layer.dirty = False
@@ -1,27 +1,29 @@
 #!/usr/bin/env python3
 
-from time import time, sleep
 from itertools import count
 from math import sin, cos, pi
+from argparse import ArgumentParser
+from sys import stderr
 
 from .ansi import ANSICodes
 from .term import TermScreen, TermThings
+from .clock import FrameClock
+from .stats import FrameStats
+from .record import Recorder
 
 """
 A demo of the TermScreen and TermThings classes, with an animation of a block
 undergoing simple harmonic motion.
 """
 
-def main():
-    term = TermScreen()
-    
+def frames(term, fps):
+    """
+    Streams the objects to be drawn onto the screen during each frame.
+    """
+
     # Set the width and height of the block, as number of lines and columns occupied.
     width, height = 10, 5
 
-    # Set the frame-rate.
-    fps = 30
-    period = 1 / fps
-
     # Calculate the parameters required to execute simple harmonic motion.
     left, right = 0, term.columns - width
     delta = right - left
@@ -29,8 +31,6 @@ def main():
     time_period = 10
     omega = 2 * pi / time_period
     
-    # Start the animation loop.
-    t_0 = time()
     for tick in count():
         # Calculate position and speed of the block.
         x = delta * (1 + sin(omega * tick / fps)) / 2
@@ -38,37 +38,61 @@ def main():
         column = round(x)
 
         # Create the box object.
-        box = list(TermThings.box(" ", range(0, height), range(column, column + width), bg="white"))
+        box = TermThings.box(" ", range(0, height), range(column, column + width), bg="white")
         # Create a text object indicating the current position and speed.
         indicator = TermThings.text(f"Box has x coordinate {x:.2f} and speed {speed:.2f}", height + 1, 0)
         # Create a "Hello World!" text object centered on the screen.
-        hello = list(TermThings.text("Hello World!", height // 2, (term.columns - 12) // 2, bold=True))
+        hello = TermThings.text("Hello World!", height // 2, (term.columns - 12) // 2, bold=True)
 
         # Colour the "Hello World!" text bright red if it intersects with the box.
         intersection = TermThings.intersection(box, hello)
         if intersection:
             hello = TermThings.fg(hello, 'RED')    
 
-        # Draw all objects to screen. The order is respected, so the "Hello World!" text is layered
+        # Yield all objects to be drawn. The order is respected, so the "Hello World!" text is layered
         # over the block.
-        term.draw_things(box, hello, indicator)
-        term.draw_things(TermThings.text("Text and box intersect at " + str(len(intersection)) + " cells", height + 2, 0))
-        # Refresh the screen.
-        term.paint()
-        
-        # Update timings, sleep for just the right amount of time.
-        t = time()
-        t_next = t_0 + period
-        if t < t_next:
-            sleep(t_next - t)
-        t_0 = time()
+        yield [box, hello, indicator, TermThings.text("Text and box intersect at " + str(len(intersection)) + " cells", height + 2, 0)]
+
+
+def main(stats=None, show_stats=False, record=None):
+    term = TermScreen(stats=stats)
+    # Record every frame painted to a file, if asked to, while still displaying it.
+    if record is not None:
+        term.writer = Recorder(record, term.writer, (term.lines, term.columns))
+
+    # Set the frame-rate.
+    fps = 30
+    clock = FrameClock(fps, skip=True)
+
+    # Start the animation loop. The clock waits until each frame is due, skipping frames if we fall behind.
+    try:
+        for frame in clock.run(frames(term, fps)):
+            # Draw all objects to screen.
+            term.draw_things(*frame)
+            # Show the rolling performance statistics on the bottom line, if asked to.
+            if show_stats:
+                term.draw_things(TermThings.text(stats.report(), term.lines - 1, 0))
+            # Refresh the screen.
+            term.paint()
+    finally:
+        term.writer.close()
 
 
 if __name__ == '__main__':
+    parser = ArgumentParser("Simple harmonic motion in the terminal")
+    parser.add_argument("--stats", action="store_true", help="show the frame-rate, frame times and output rate")
+    parser.add_argument("--trace", type=str, metavar="FILE", help="dump a Chrome trace of every frame to FILE")
+    parser.add_argument("--record", type=str, metavar="FILE", help="record every frame to FILE, to be played with termanim.record")
+    args = parser.parse_args()
+    stats = FrameStats(trace=args.trace is not None) if args.stats or args.trace else None
     try:
         print(ANSICodes.HIDE_CURSOR)
-        main()
+        main(stats, args.stats, args.record)
     except KeyboardInterrupt:
         pass
     finally:
         print(ANSICodes.SHOW_CURSOR)
+        if args.stats:
+            print(stats.report(), file=stderr)
+        if args.trace:
+            stats.dump_trace(args.trace)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+from itertools import count
+from math import sin, cos, pi
+from argparse import ArgumentParser
+from sys import stderr
+import numpy as np
+
+from .ansi import ANSICodes
+from .term import TermThings
+from .arrays import TermScreenArray
+from .pixels import PixelCanvas
+from .clock import FrameClock
+from .stats import FrameStats
+from .record import Recorder
+
+"""
+A demo of the PixelCanvas class, with a block undergoing simple harmonic motion in steps smaller
+than a cell.
+"""
+
+WHITE = (255, 255, 255)
+
+def sky(canvas):
+    """
+    Creates a vertical gradient of pixels covering the canvas, from dark blue at the top to orange
+    at the bottom.
+    """
+
+    mix = np.linspace(0.0, 1.0, canvas.height, dtype=np.float32)[:, None, None]
+    top, bottom = np.array([10, 20, 60], dtype=np.float32), np.array([230, 120, 40], dtype=np.float32)
+    column = np.rint(top + (bottom - top) * mix).astype(np.uint8)
+    return np.repeat(column, canvas.width, axis=1)
+
+def frames(canvas, fps):
+    """
+    Streams the position of the block during each frame, as fractional pixels.
+    """
+
+    # Set the width and height of the block, in pixels.
+    width, height = 12.0, 8.0
+
+    # The block moves across the canvas with a period of 10 seconds, and bobs up and down with a
+    # period of 3 seconds.
+    omega_x, omega_y = 2 * pi / 10, 2 * pi / 3
+    for tick in count():
+        t = tick / fps
+        x = (canvas.width - width) * (1 + sin(omega_x * t)) / 2
+        y = (canvas.height - height) * (1 + cos(omega_y * t)) / 2
+        yield x, y, width, height
+
+
+def main(stats=None, show_stats=False, record=None, depth="truecolor"):
+    term = TermScreenArray(stats=stats, depth=depth)
+    # Record every frame painted to a file, if asked to, while still displaying it.
+    if record is not None:
+        term.writer = Recorder(record, term.writer, (term.lines, term.columns))
+
+    # Set the frame-rate.
+    fps = 30
+    clock = FrameClock(fps, skip=True)
+
+    # The canvas covers the whole screen, with two pixels to each cell. The background is drawn once,
+    # and copied onto the canvas at the start of every frame.
+    canvas = PixelCanvas(term)
+    background = sky(canvas)
+
+    # Start the animation loop. The clock waits until each frame is due, skipping frames if we fall behind.
+    try:
+        for x, y, width, height in clock.run(frames(canvas, fps)):
+            canvas.blit(background, 0, 0)
+            # The edges of the block are blended in with the sky, in proportion to how much of each
+            # pixel they cover, so the block moves smoothly by fractions of a pixel.
+            canvas.fill(y, x, height, width, WHITE, alpha=0.9)
+            canvas.draw()
+            term.draw_things(TermThings.text(f"x = {x:6.2f}, y = {y:6.2f}", 0, 0, fg=WHITE))
+            # Show the rolling performance statistics on the bottom line, if asked to.
+            if show_stats:
+                term.draw_things(TermThings.text(stats.report(), term.lines - 1, 0, fg=WHITE))
+            term.paint()
+    finally:
+        term.writer.close()
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser("Simple harmonic motion in the terminal, with half block pixels")
+    parser.add_argument("--depth", choices=["truecolor", "256", "16"], default="truecolor", help="colour depth of the terminal")
+    parser.add_argument("--stats", action="store_true", help="show the frame-rate, frame times and output rate")
+    parser.add_argument("--trace", type=str, metavar="FILE", help="dump a Chrome trace of every frame to FILE")
+    parser.add_argument("--record", type=str, metavar="FILE", help="record every frame to FILE, to be played with termanim.record")
+    args = parser.parse_args()
+    stats = FrameStats(trace=args.trace is not None) if args.stats or args.trace else None
+    try:
+        print(ANSICodes.HIDE_CURSOR)
+        main(stats, args.stats, args.record, args.depth)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(ANSICodes.SHOW_CURSOR)
+        if args.stats:
+            print(stats.report(), file=stderr)
+        if args.trace:
+            stats.dump_trace(args.trace)
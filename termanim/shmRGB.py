@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
 
-from time import time, sleep
 from itertools import count
 from math import sin, cos, pi
+from argparse import ArgumentParser
+from sys import stderr
 
 from .ansi import ANSICodes
 from .term import TermScreenRGB, TermThings
+from .clock import FrameClock
+from .cache import FrameCache
+from .scene import Scene
+from .stats import FrameStats
+from .record import Recorder
 
 """
 A demo of the TermScreenRGB class, with 24 bit colour objects displayed on the terminal.
@@ -16,8 +22,10 @@ RED = (255, 0, 0)
 GREEN = (0, 255, 0)
 BLUE = (0, 0, 255)
 
-def main():
-    term = TermScreenRGB()
+def gradient_box(term):
+    """
+    Creates the large gradient box, centered on the screen.
+    """
 
     # Set the width and height of the large gradient box.
     size = min(term.columns // 2, term.lines) - 10
@@ -38,8 +46,12 @@ def main():
     # Apply a radial(ish) gradient on the bottom right corner (yellow).
     # The mixfunc indicates the strength of the yellow colour, which is maximum at the (1.0, 1.0)
     # coordinate and fades away with distance.
-    box = TermThings.gradient(box, bg=(255, 255, 0), mixfunc=lambda y, x: 0.2 / ((1 - x)**2 + (1 - y)**2 + 0.2))
-    box = list(box)
+    return TermThings.gradient(box, bg=(255, 255, 0), mixfunc=lambda y, x: 0.2 / ((1 - x)**2 + (1 - y)**2 + 0.2))
+
+def frames(term, fps):
+    """
+    Streams the moving objects to be drawn over the gradient box during each frame.
+    """
 
     # Create a "Hello World!" text object centered on the screen.
     hello = TermThings.text(
@@ -48,7 +60,6 @@ def main():
         (term.columns - 12) // 2,
         fg=WHITE
     )
-    hello = list(hello)
 
     # Create an oscillating block/slider, bluish in colour and slightly transparent.
     slider_width, slider_height = 10, 5
@@ -59,18 +70,11 @@ def main():
         bg=(128, 128, 255),
         alpha=0.5
     )
-    slider = list(slider)
-    
-    # Set the frame-rate.
-    fps = 30
-    period = 1 / fps
 
     # Parameters for simple harmonic motion.
     time_period = 2
     omega = 2 * pi / time_period
 
-    # Start the animation loop.
-    t_0 = time()
     for tick in count():
         # The "Hello World!" text pulses periodically (2 seconds), by having its
         # alpha transparency vary sinusoidally between 0.33 and 1.0
@@ -78,30 +82,73 @@ def main():
         # The sliding block also oscillates periodically (10 seconds) from left right.
         x = (term.columns - slider_width) * (1 - sin(omega / 5 * tick / fps)) / 2
 
-        # Draw the gradient box.
-        term.draw_things(box)
-        # Draw the sliding box at the appropriate location.
-        term.draw_things(TermThings.translate(slider, 0, round(x)))
-        # Draw the "Hello World!" text with the appropriate transparency.
-        term.draw_things(TermThings.alpha(hello, alpha))
-        # Draw a text indicator on the top right, denoting the position of the sliding box.
-        term.draw_things(TermThings.text(f"{x:.2f}", 0, 0, fg=WHITE))
-        # Refresh the screen.
-        term.paint()
-        
-        # Update timings, sleep for just the right amount of time.
-        t = time()
-        t_next = t_0 + period
-        if t < t_next:
-            sleep(t_next - t)
-        t_0 = time()
+        yield [
+            # The sliding box at the appropriate location.
+            TermThings.translate(slider, 0, round(x)),
+            # The "Hello World!" text with the appropriate transparency.
+            TermThings.alpha(hello, alpha),
+            # A text indicator on the top right, denoting the position of the sliding box.
+            TermThings.text(f"{x:.2f}", 0, 0, fg=WHITE),
+        ]
+
+
+def main(stats=None, show_stats=False, record=None, depth="truecolor"):
+    term = TermScreenRGB(stats=stats, depth=depth)
+    # Record every frame painted to a file, if asked to, while still displaying it.
+    if record is not None:
+        term.writer = Recorder(record, term.writer, (term.lines, term.columns))
+
+    # Set the frame-rate.
+    fps = 30
+    clock = FrameClock(fps, skip=True)
+
+    # The whole animation repeats itself every 10 seconds, so painted frames are cached and replayed
+    # after the first loop. The statistics shown on the bottom line differ from one loop to the next,
+    # so nothing is cached while they are being shown.
+    loop = 10 * fps
+    cache = FrameCache(budget=32 * 2**20) if not show_stats else None
+
+    # The gradient box never changes, so it sits on a layer of its own at the bottom of the scene.
+    # It is blended once and kept in the background, and only the cells covered by the layer on top
+    # of it are blended again each frame.
+    scene = Scene(term)
+    scene.layer(gradient_box(term))
+    sprites = scene.layer()
+
+    # Start the animation loop. The clock waits until each tick is due, skipping ticks if we fall behind.
+    try:
+        for tick, frame in clock.run(enumerate(frames(term, fps))):
+            tick %= loop
+            if cache is not None and term.replay(cache, tick):
+                continue
+
+            # Show the rolling performance statistics on the bottom line, if asked to.
+            if show_stats:
+                frame.append(TermThings.text(stats.report(), term.lines - 1, 0, fg=WHITE))
+            sprites.set(*frame)
+            # Draw the scene, and refresh the screen, keeping the frame in the cache.
+            scene.draw()
+            term.paint(cache, tick)
+    finally:
+        term.writer.close()
 
 
 if __name__ == '__main__':
+    parser = ArgumentParser("Simple harmonic motion in the terminal, with RGB colours")
+    parser.add_argument("--depth", choices=["truecolor", "256", "16"], default="truecolor", help="colour depth of the terminal")
+    parser.add_argument("--stats", action="store_true", help="show the frame-rate, frame times and output rate")
+    parser.add_argument("--trace", type=str, metavar="FILE", help="dump a Chrome trace of every frame to FILE")
+    parser.add_argument("--record", type=str, metavar="FILE", help="record every frame to FILE, to be played with termanim.record")
+    args = parser.parse_args()
+    stats = FrameStats(trace=args.trace is not None) if args.stats or args.trace else None
     try:
         print(ANSICodes.HIDE_CURSOR)
-        main()
+        main(stats, args.stats, args.record, args.depth)
     except KeyboardInterrupt:
         pass
     finally:
         print(ANSICodes.SHOW_CURSOR)
+        if args.stats:
+            print(stats.report(), file=stderr)
+        if args.trace:
+            stats.dump_trace(args.trace)
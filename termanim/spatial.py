@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+
+from itertools import combinations, product
+
+from .term import Sprite, TermThings
+
+class SpatialIndex:
+    """
+    An index of drawable objects by position, for finding which of many objects overlap.
+
+    Each object is stored under a key, along with its bounding box. The screen is divided into a
+    uniform grid of buckets, each spanning a number of lines and columns given by bucket, and each
+    object is listed in every bucket its bounding box touches. Only objects sharing a bucket can
+    overlap, and only those whose bounding boxes overlap have their cells compared.
+
+    Objects are moved by adding them again under the same key, which only updates the buckets the
+    object enters or leaves. Objects are read into sprites, so that a sprite moved with translate
+    keeps the cells of its columns from one frame to the next.
+
+    A collision loop is intended to be of the following form.
+    >>> index = SpatialIndex()
+    >>> for frame in frames:
+    >>>     for key, sprite in frame.items():
+    >>>         index.add(key, sprite)
+    >>>     for (key_1, key_2), cells in index.collisions().items():
+    >>>         ...
+    """
+
+    def __init__(self, bucket=(8, 16)):
+        self.bucket = bucket
+        self._things = {}
+        self._bounds = {}
+        self._spans = {}
+        self._buckets = {}
+
+    def _span(self, bounds):
+        """
+        The range of buckets touched by a bounding box, as a tuple (top, left, bottom, right).
+        """
+
+        if bounds is None:
+            return None
+        top, left, bottom, right = bounds
+        height, width = self.bucket
+        return top // height, left // width, bottom // height, right // width
+
+    def _keys(span):
+        top, left, bottom, right = span
+        return product(range(top, bottom + 1), range(left, right + 1))
+
+    def add(self, key, thing):
+        """
+        Adds a drawable object to the index under the supplied key, replacing any object already
+        stored under it.
+        """
+
+        thing = Sprite.of(thing)
+        bounds = thing.bounds()
+        span = self._span(bounds)
+        old_span = self._spans.get(key)
+        if span != old_span:
+            old = set(SpatialIndex._keys(old_span)) if old_span is not None else set()
+            new = set(SpatialIndex._keys(span)) if span is not None else set()
+            for bucket in old - new:
+                keys = self._buckets[bucket]
+                keys.discard(key)
+                if not keys:
+                    del self._buckets[bucket]
+            for bucket in new - old:
+                self._buckets.setdefault(bucket, set()).add(key)
+        self._things[key] = thing
+        self._bounds[key] = bounds
+        self._spans[key] = span
+
+    def remove(self, key):
+        """
+        Removes the object stored under the supplied key from the index.
+        """
+
+        span = self._spans.pop(key)
+        del self._things[key]
+        del self._bounds[key]
+        if span is not None:
+            for bucket in SpatialIndex._keys(span):
+                keys = self._buckets[bucket]
+                keys.discard(key)
+                if not keys:
+                    del self._buckets[bucket]
+
+    def __contains__(self, key):
+        return key in self._things
+
+    def __len__(self):
+        return len(self._things)
+
+    def __getitem__(self, key):
+        return self._things[key]
+
+    def bounds(self, key):
+        """
+        The bounding box of the object stored under the supplied key, or None if it has no cells.
+        """
+
+        return self._bounds[key]
+
+    def candidates(self, bounds):
+        """
+        The keys of the objects whose bounding boxes overlap the supplied bounding box.
+        """
+
+        span = self._span(bounds)
+        if span is None:
+            return set()
+        keys = set()
+        for bucket in SpatialIndex._keys(span):
+            keys |= self._buckets.get(bucket, set())
+        return {key for key in keys if TermThings.overlap(bounds, self._bounds[key]) is not None}
+
+    def intersection(self, key_1, key_2):
+        """
+        The set of coordinates shared by the objects stored under the supplied keys.
+        """
+
+        return TermThings.intersection(self._things[key_1], self._things[key_2])
+
+    def query(self, thing):
+        """
+        Finds the objects in the index which share cells with a drawable object. Returns a dictionary
+        mapping their keys to the sets of shared coordinates.
+        """
+
+        thing = Sprite.of(thing)
+        hits = {}
+        for key in self.candidates(thing.bounds()):
+            cells = TermThings.intersection(thing, self._things[key])
+            if cells:
+                hits[key] = cells
+        return hits
+
+    def collisions(self):
+        """
+        Finds every pair of objects in the index which share cells. Returns a dictionary mapping pairs
+        of keys, in the order the objects were first added, to the sets of shared coordinates.
+        """
+
+        order = {key: n for n, key in enumerate(self._things)}
+        pairs = set()
+        for keys in self._buckets.values():
+            if len(keys) > 1:
+                pairs.update(combinations(sorted(keys, key=order.__getitem__), 2))
+        hits = {}
+        for key_1, key_2 in sorted(pairs, key=lambda pair: (order[pair[0]], order[pair[1]])):
+            if TermThings.overlap(self._bounds[key_1], self._bounds[key_2]) is None:
+                continue
+            cells = TermThings.intersection(self._things[key_1], self._things[key_2])
+            if cells:
+                hits[key_1, key_2] = cells
+        return hits
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+from collections import deque
+from json import dump
+
+class FrameStats:
+    """
+    Collects performance metrics for every frame painted by a screen.
+
+    A screen created with stats=FrameStats() records each frame it paints (or replays) as a dictionary
+    holding the number of cells drawn, the number of cells emitted and the number of bytes written,
+    along with the time spent drawing and blending objects, encoding ANSI codes, and writing to the
+    terminal. Times are in seconds, as measured by time.perf_counter. The start and end of each frame
+    are recorded too, where a frame starts when something is first drawn onto it.
+
+    If a callback is supplied, it is called with the metrics of each frame as it is recorded. Summaries
+    are computed over the last window frames, and if trace is set, every frame is kept so that the
+    whole run can be dumped as a trace for Chrome's trace viewer (chrome://tracing or Perfetto).
+    """
+
+    def __init__(self, window=120, callback=None, trace=False):
+        self.callback = callback
+        self.frames = 0
+        self.bytes_written = 0
+        self._window = deque(maxlen=window)
+        self._trace = [] if trace else None
+
+    def record(self, frame):
+        """
+        Records the metrics of a single frame.
+        """
+
+        self.frames += 1
+        self.bytes_written += frame["bytes"]
+        self._window.append(frame)
+        if self._trace is not None:
+            self._trace.append(frame)
+        if self.callback is not None:
+            self.callback(frame)
+
+    def fps(self):
+        """
+        The rolling frame-rate over the last few frames.
+        """
+
+        if len(self._window) < 2 or self._window[-1]["end"] == self._window[0]["end"]:
+            return 0.0
+        return (len(self._window) - 1) / (self._window[-1]["end"] - self._window[0]["end"])
+
+    def bytes_per_second(self):
+        """
+        The rolling rate at which bytes are written to the terminal, over the last few frames.
+        """
+
+        if len(self._window) < 2 or self._window[-1]["end"] == self._window[0]["end"]:
+            return 0.0
+        nbytes = sum(frame["bytes"] for frame in self._window) - self._window[0]["bytes"]
+        return nbytes / (self._window[-1]["end"] - self._window[0]["end"])
+
+    def percentile(self, q, name="total"):
+        """
+        The q-th percentile (0 to 100) of a metric over the last few frames. The default metric is
+        the total time spent on each frame, namely the time spent drawing, encoding and writing it.
+        """
+
+        if not self._window:
+            return 0.0
+        values = sorted(FrameStats._metric(frame, name) for frame in self._window)
+        return values[min(int(q / 100 * len(values)), len(values) - 1)]
+
+    def _metric(frame, name):
+        if name == "total":
+            return frame["draw"] + frame["encode"] + frame["write"]
+        return frame[name]
+
+    def report(self):
+        """
+        A short summary of the rolling frame-rate, frame time percentiles and output rate.
+        """
+
+        p50, p95, p99 = (1000 * self.percentile(q) for q in (50, 95, 99))
+        return f"{self.fps():.1f} fps, frame time p50 {p50:.2f} ms, p95 {p95:.2f} ms, p99 {p99:.2f} ms, " + \
+            f"{self.bytes_per_second() / 1024:.1f} kB/s"
+
+    def trace_events(self):
+        """
+        The recorded frames as a list of events in the Chrome trace event format. Each frame becomes
+        a span holding spans for drawing, encoding and writing, along with counters for the cells
+        and bytes. Drawing may be spread across the frame, so its span only shows the total time.
+        """
+
+        if self._trace is None:
+            raise ValueError("FrameStats was not created with trace=True")
+        events = []
+        us = lambda t: round(t * 1e6, 3)
+        for n, frame in enumerate(self._trace):
+            common = {"pid": 1, "tid": 1}
+            write_start = frame["end"] - frame["write"]
+            encode_start = write_start - frame["encode"]
+            events.append(dict(common, name="frame", ph="X", ts=us(frame["start"]),
+                dur=us(frame["end"] - frame["start"]), args={"frame": n}))
+            events.append(dict(common, name="draw", ph="X", ts=us(frame["start"]), dur=us(frame["draw"])))
+            events.append(dict(common, name="encode", ph="X", ts=us(encode_start), dur=us(frame["encode"])))
+            events.append(dict(common, name="write", ph="X", ts=us(write_start), dur=us(frame["write"])))
+            events.append(dict(common, name="cells", ph="C", ts=us(frame["end"]),
+                args={"drawn": frame["drawn"], "emitted": frame["emitted"]}))
+            events.append(dict(common, name="bytes", ph="C", ts=us(frame["end"]), args={"bytes": frame["bytes"]}))
+        return events
+
+    def dump_trace(self, path):
+        """
+        Writes the recorded frames to a JSON file, which can be loaded into Chrome's trace viewer.
+        """
+
+        with open(path, "w") as f:
+            dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, f)
@@ -1,18 +1,51 @@
 #!/usr/bin/env python3
 
 from shutil import get_terminal_size
+from time import perf_counter
+from signal import signal, getsignal, SIGWINCH
+from weakref import ref
+from itertools import repeat, chain
+from array import array
+try:
+    import numpy as np
+except ImportError:
+    np = None
 from .ansi import ANSICodes
-from os import write
+from .output import FdWriter
+from .palette import Palette
+
+# The number of colour codes cached by each screen, before the cache is emptied.
+CODE_CACHE_SIZE = 4096
+# The number of rows which must be brought back into place by a scroll, before the terminal is scrolled.
+SCROLL_MIN_ROWS = 2
+# The number of cells a drawable object must have, before it is drawn by TermScreenRGB as a batch.
+BATCH_MIN_CELLS = 32
+RESET = ANSICodes.RESET.encode("ascii")
+BOLD = ANSICodes.BOLD.encode("ascii")
 
 class TermScreen:
     """
     An interface for creating simple ASCII graphics on the terminal.
     """
 
-    def __init__(self, size=None, offset=(0, 0), wrap=False, bg=""):
+    def __init__(self, size=None, offset=(0, 0), wrap=False, bg="", writer=None, stats=None):
         """
         Sets the size and location of the drawing space on screen.
         Also allows screen wrapping, and a custom background colour.
+
+        Frames are written straight to the standard output, unless another writer from termanim.output
+        is supplied, such as a FileWriter, BufferWriter, NullWriter or ThreadedWriter.
+
+        If a stats object such as a FrameStats from termanim.stats is supplied, the metrics of every
+        frame are passed to its record method once the frame is painted.
+
+        Setting the scroll attribute lets the screen scroll the terminal when its rows move up or down
+        as a block (see _scroll). Since terminals scroll whole lines, this should only be set when the
+        screen spans the full width of the terminal.
+
+        Runs of identical cells are sent with REP (repeat the previous character) and ECH (erase
+        characters in the current background colour) where these are shorter. For terminals which
+        lack them, set the repeat or erase attributes to False.
         """
 
         if size is not None:
@@ -22,9 +55,33 @@ class TermScreen:
         self.offset = offset
         self.wrap = wrap
         self.bg = bg
+        self.writer = writer if writer is not None else FdWriter(1)
+        self.stats = stats
+        self._painted = None
+        self._t_start = None
+        self._t_draw = 0.0
+        self._cursor_shape = None
+        self._resize_pending = False
+        self._fg_cache = {}
+        self._bg_cache = {}
+        self._char_cache = {}
+        self.base = {}
         self._reset_screen()
         self.redraw = {(i, j) for i in range(self.lines) for j in range(self.columns)}
         self.redraw_past = set()
+        self._reset_displayed()
+        self.cells_emitted = 0
+        self.cells_skipped = 0
+        self.scroll = False
+        self.repeat = True
+        self.erase = True
+
+    def _reset_displayed(self):
+        """
+        Forget what is displayed on the terminal, so that every cell is sent again when next redrawn.
+        """
+
+        self.displayed = {}
 
     def _reset_screen(self):
         """
@@ -33,6 +90,114 @@ class TermScreen:
 
         self.screen = {(i, j): (" ", "", self.bg, False) for i in range(self.lines) for j in range(self.columns)}
 
+    def _clear_cells(self, cells):
+        """
+        Reset the given cells of the screenbuffer to the background, leaving the rest untouched.
+        """
+
+        blank = (" ", "", self.bg, False)
+        for cell in cells:
+            self.screen[cell] = self.base.get(cell, blank)
+
+    def freeze(self):
+        """
+        Makes everything drawn so far during this frame part of the background. Instead of being cleared
+        after each paint, frozen cells are reset to what they are now, so they need not be drawn again
+        during later frames. Anything drawn over them is blended in with them, as usual.
+        """
+
+        blank = (" ", "", self.bg, False)
+        for cell in self.redraw:
+            if self.screen[cell] != blank:
+                self.base[cell] = self.screen[cell]
+            else:
+                self.base.pop(cell, None)
+
+    def thaw(self):
+        """
+        Clears every frozen cell back to the plain background. This must be called before anything is
+        drawn for the frame.
+        """
+
+        blank = (" ", "", self.bg, False)
+        for cell in self.base:
+            self.screen[cell] = blank
+        self.redraw.update(self.base)
+        self.base = {}
+
+    def resize(self, size=None, repaint=None):
+        """
+        Changes the size of the screen, to the supplied (lines, columns) or to the size of the terminal.
+        Returns whether the size changed.
+
+        Only the cells which are added or removed are allocated or dropped. The overlapping cells keep
+        what has been drawn and frozen onto them, as well as what is known to be displayed on them, so
+        that only the added cells are sent during the next paint. However, terminals may reflow or
+        scroll what they display when they lose columns or gain or lose lines, so in those cases every
+        cell is sent once more during the next paint. The repaint option overrides this choice.
+        """
+
+        if size is not None:
+            lines, columns = size
+        else:
+            columns, lines = get_terminal_size()
+        if (lines, columns) == (self.lines, self.columns):
+            return False
+        if repaint is None:
+            repaint = lines != self.lines or columns < self.columns
+        for cells in self.writer.dropped():
+            self._forget_cells(cells)
+        self._resize_buffers(lines, columns, repaint)
+        self._painted = None
+        return True
+
+    def _resize_buffers(self, lines, columns, repaint):
+        """
+        Adds and removes cells of the screenbuffer, the background and the displayed dictionary, so
+        that they cover the new size. Added cells are to be sent during the next paint, along with
+        every other cell if repaint is set.
+        """
+
+        removed = TermScreen._outside((self.lines, self.columns), (lines, columns))
+        added = TermScreen._outside((lines, columns), (self.lines, self.columns))
+        for cell in removed:
+            del self.screen[cell]
+            self.base.pop(cell, None)
+            self.displayed.pop(cell, None)
+        self.redraw.difference_update(removed)
+        self.redraw_past.difference_update(removed)
+        self.lines, self.columns = lines, columns
+        self._clear_cells(added)
+        self._forget_cells(self.screen if repaint else added)
+
+    def _outside(size, inner):
+        """
+        The cells of a screen of the supplied size which lie outside a screen of the inner size.
+        """
+
+        (lines, columns), (inner_lines, inner_columns) = size, inner
+        cells = [(i, j) for i in range(min(lines, inner_lines)) for j in range(inner_columns, columns)]
+        cells += [(i, j) for i in range(inner_lines, lines) for j in range(columns)]
+        return cells
+
+    def watch_resize(self):
+        """
+        Resizes the screen to fit the terminal whenever the terminal is resized, as signalled by
+        SIGWINCH. The screen is resized at the start of the next paint, keeping whatever was drawn for
+        that frame within the new size, so animations should read the lines and columns of the screen
+        afresh for every frame. Any handler already set for SIGWINCH is still called.
+        """
+
+        previous = getsignal(SIGWINCH)
+        screen = ref(self)
+
+        def handler(signum, frame):
+            if screen() is not None:
+                screen()._resize_pending = True
+            if callable(previous):
+                previous(signum, frame)
+        signal(SIGWINCH, handler)
+
     def draw(self, char, line, column, fg="", bg="", bold=False, *args):
         """
         Draw an object onto the screenbuffer.
@@ -66,46 +231,491 @@ class TermScreen:
         Draws the supplied objects onto the screenbuffer, in order.
         """
 
+        t = perf_counter() if self.stats is not None else None
         for thing in things:
             for cell in thing:
                 self.draw(*cell)
+        if t is not None:
+            self._timed_draw(t)
+
+    def _timed_draw(self, t):
+        """
+        Adds the time spent drawing since t to the metrics of the current frame.
+        """
+
+        if self._t_start is None:
+            self._t_start = t
+        self._t_draw += perf_counter() - t
+
+    def _visible(self, char, fg, bg, bold):
+        """
+        Reduces the contents of a cell to what is actually visible on the terminal. The foreground
+        colour and boldness of blank cells cannot be seen, so they are dropped.
+        """
+
+        if char == " ":
+            return char, "", bg, False
+        return char, fg, bg, bold
+
+    def _redraw_cells(self):
+        """
+        Streams the cells which need to be redrawn, in order, as tuples of the form
+        (line, column, char, fg, bg, bold).
+
+        The visible state of every cell sent to the terminal is remembered in the displayed dictionary.
+        Cells which need to be redrawn, but look exactly like what is already displayed, are skipped.
+        The number of cells emitted and skipped during the latest paint are kept in cells_emitted and
+        cells_skipped.
+        """
+
+        self.cells_emitted = 0
+        self.cells_skipped = 0
+        self._emitted = []
+        for (i, j) in sorted(self.redraw | self.redraw_past):
+            cell = self._visible(*self.screen[i, j])
+            if self.displayed.get((i, j)) == cell:
+                self.cells_skipped += 1
+                continue
+            self.displayed[i, j] = cell
+            self.cells_emitted += 1
+            self._emitted.append((i, j))
+            yield (i, j, *cell)
+
+    def _forget_cells(self, cells):
+        """
+        Forget what is displayed in the given cells, which were emitted during some earlier paint,
+        so that they are sent again during the next paint. Cells which are no longer on the screen,
+        since it was resized, are ignored.
+        """
+
+        cells = [cell for cell in cells if cell in self.screen]
+        for cell in cells:
+            self.displayed.pop(cell, None)
+        self.redraw_past.update(cells)
+
+    def _fg_code(self, fg):
+        """
+        The ANSI code for a foreground colour.
+        """
+
+        return ANSICodes.FG_COLORS.get(fg, "")
+
+    def _bg_code(self, bg):
+        """
+        The ANSI code for a background colour.
+        """
+
+        return ANSICodes.BG_COLORS.get(bg, "")
+
+    def _cached_code(self, cache, code, colour):
+        """
+        Adds the encoded ANSI code for a colour to one of the bounded code caches, and returns it.
+        A cache which grows too large is simply emptied.
+        """
+
+        if len(cache) >= CODE_CACHE_SIZE:
+            cache.clear()
+        cache[colour] = code(colour).encode("ascii")
+        return cache[colour]
+
+    def _cursor_codes(self):
+        """
+        The encoded cursor movements to each cell of the screen, as the start of the ANSI code for
+        each line along with the end of the code for each column. These are worked out once, and
+        again only if the size or offset of the screen change.
+        """
+
+        shape = (self.lines, self.columns, self.offset)
+        if self._cursor_shape != shape:
+            off_i, off_j = self.offset
+            self._cursor_lines = [f"\033[{1 + i + off_i};".encode("ascii") for i in range(self.lines)]
+            self._cursor_columns = [f"{1 + j + off_j}H".encode("ascii") for j in range(self.columns)]
+            self._cursor_shape = shape
+        return self._cursor_lines, self._cursor_columns
+
+    def _find_shift(new, old):
+        """
+        Finds the shift s such that the most rows of the new frame match row (i + s) of what is
+        displayed, among the rows which do not already match. Rows which are not unique among those
+        displayed are ignored, since they would match any shift. Returns the shift along with the
+        rows which match, or None if there are too few of them.
+        """
+
+        positions = {}
+        for k, row in enumerate(old):
+            if row is not None:
+                positions[row] = k if row not in positions else None
+        votes = {}
+        for i, row in enumerate(new):
+            k = positions.get(row)
+            if k is not None and k != i:
+                votes.setdefault(k - i, []).append(i)
+        if not votes:
+            return None
+        shift, rows = max(votes.items(), key=lambda vote: len(vote[1]))
+        if len(rows) < SCROLL_MIN_ROWS:
+            return None
+        return shift, rows
 
-    def _get_redraw_chars(self):
+    def _scroll(self):
         """
-        Converts the screenbuffer contents to proper ANSI codes, and streams them in order.
+        Scrolls the terminal when the rows of the screen have moved up or down as a block, so that
+        the rows already displayed are moved into place instead of being sent again. Returns the ANSI
+        codes for the scroll, along with the first and last lines scrolled.
+
+        The lines scrolled are set as the scroll region of the terminal, which is scrolled and then
+        reset. Rows scrolled in from outside the region are blanked by the terminal, so they are sent
+        again, and every cell of the rows of the region which were not found to match is compared
+        against what is now displayed.
+        """
+
+        if not self.scroll:
+            return None
+        # Only rows which have changed can have moved, and too few of them cannot make up a scroll.
+        rows = self._changed_rows()
+        if len(rows) < SCROLL_MIN_ROWS:
+            return None
+        found = TermScreen._find_shift(*self._row_keys(rows))
+        if found is None:
+            return None
+        shift, rows = found
+        top, bottom = min(rows[0], rows[0] + shift), max(rows[-1], rows[-1] + shift)
+        self._shift_rows(top, bottom, shift, rows)
+        code = ANSICodes.SCROLL_UP.format(shift) if shift > 0 else ANSICodes.SCROLL_DOWN.format(-shift)
+        off_i = self.offset[0]
+        code = ANSICodes.SCROLL_REGION.format(1 + top + off_i, 1 + bottom + off_i) + code + ANSICodes.RESET_SCROLL_REGION
+        return code.encode("ascii"), top, bottom
+
+    def _changed_rows(self):
+        """
+        The rows holding cells to be compared against what is displayed during this paint, in order.
+        """
+
+        return sorted({i for i, j in self.redraw} | {i for i, j in self.redraw_past})
+
+    def _row_keys(self, rows):
+        """
+        Hashable keys for the visible contents of the supplied rows of the screenbuffer, with None for
+        the other rows, along with keys for what is displayed on each row. Rows which are not fully
+        known to be displayed have no key.
+
+        Most cells along a row look alike, so the visible contents of each distinct cell are only
+        worked out once.
+        """
+
+        screen, displayed, visible = self.screen, self.displayed, _VisibleCells(self)
+        new = [None] * self.lines
+        for i in rows:
+            new[i] = tuple(map(visible.__getitem__, map(screen.__getitem__, zip(repeat(i), range(self.columns)))))
+        old = []
+        for i in range(self.lines):
+            row = tuple(map(displayed.get, zip(repeat(i), range(self.columns))))
+            old.append(row if None not in row else None)
+        return new, old
+
+    def _shift_rows(self, top, bottom, shift, matched):
+        """
+        Moves what is displayed on the rows from top to bottom by the supplied shift, as the terminal
+        does when scrolled, and marks every cell of those rows to be compared during this paint, apart
+        from the matched rows which are known to be displayed exactly once they have moved.
+        """
+
+        displayed, columns = self.displayed, range(self.columns)
+        region = range(top, bottom + 1)
+        old = {i: list(map(displayed.get, zip(repeat(i), columns))) for i in region}
+        for i in region:
+            row = old.get(i + shift)
+            if row is not None and None not in row:
+                displayed.update(zip(zip(repeat(i), columns), row))
+                continue
+            for j in columns:
+                if row is not None and row[j] is not None:
+                    displayed[i, j] = row[j]
+                else:
+                    displayed.pop((i, j), None)
+        for i in set(region).difference(matched):
+            self.redraw_past.update(zip(repeat(i), columns))
+
+    def _scrolled_rows(self, top, bottom):
+        """
+        Adds the cells of the rows scrolled during this paint to the emitted cells, since what is
+        displayed on them changed.
+        """
+
+        emitted = set(self._emitted)
+        self._emitted += [(i, j) for i in range(top, bottom + 1) for j in range(self.columns) if (i, j) not in emitted]
+
+    def _encode(self):
+        """
+        Converts the screenbuffer contents to proper ANSI codes, and returns them as bytes.
         Only the characters which need to be redrawn, i.e. those which differ from the previous
         buffer are supplied.
+
+        Horizontally adjacent cells are joined into runs, which share a single cursor movement.
+        Within a run, only the colour and bold codes which differ from those of the previous cell
+        are sent, and the attributes are reset once at the end of the run. Blank cells simply keep
+        whatever foreground colour and boldness are current.
+
+        Every code is looked up already encoded, from the cursor movements of _cursor_codes and the
+        caches of colour codes and characters, and the output is assembled in a single bytearray.
+        If the terminal is scrolled, the codes for the scroll come first. Runs of identical cells are
+        gathered up and sent as compactly as the terminal allows (see _run_codes).
         """
 
-        off_i, off_j = self.offset
-        for (i, j) in sorted(self.redraw | self.redraw_past):
-            char, fg, bg, bold = self.screen[i, j]
-            fg_code = ANSICodes.FG_COLORS.get(fg, "")
-            bg_code = ANSICodes.BG_COLORS.get(bg, "")
-            bold_code = ANSICodes.BOLD if bold else ""
-            yield ANSICodes.GOTO.format(1 + i + off_i, 1 + j + off_j) + \
-                fg_code + bg_code + bold_code + char + ANSICodes.RESET
+        scrolled = self._scroll()
+        cursor_lines, cursor_columns = self._cursor_codes()
+        fg_cache, bg_cache, char_cache = self._fg_cache, self._bg_cache, self._char_cache
+        output = bytearray(scrolled[0] if scrolled is not None else b"")
+        compress = self.repeat or self.erase
+        next_cell = None
+        last, repeats = None, 0
+        for i, j, char, fg, bg, bold in self._redraw_cells():
+            if (i, j) != next_cell:
+                if repeats:
+                    output += self._run_codes(last, repeats, True)
+                    repeats = 0
+                if next_cell is not None:
+                    output += RESET
+                output += cursor_lines[i]
+                output += cursor_columns[j]
+                fg_, bg_, bold_ = b"", b"", False
+                last = None
+            if char == " ":
+                fg_code, bold = fg_, bold_
+            else:
+                fg_code = fg_cache.get(fg)
+                if fg_code is None:
+                    fg_code = self._cached_code(fg_cache, self._fg_code, fg)
+            bg_code = bg_cache.get(bg)
+            if bg_code is None:
+                bg_code = self._cached_code(bg_cache, self._bg_code, bg)
+            encoded = char_cache.get(char)
+            if encoded is None:
+                encoded = char_cache[char] = char.encode("utf-8")
+            next_cell = (i, j + 1)
+            if compress:
+                if encoded == last and fg_code == fg_ and bg_code == bg_ and bold == bold_:
+                    repeats += 1
+                    continue
+                if repeats:
+                    output += self._run_codes(last, repeats, False)
+                    repeats = 0
+                last = encoded
+            if (fg_ and not fg_code) or (bg_ and not bg_code) or (bold_ and not bold):
+                output += RESET
+                fg_, bg_, bold_ = b"", b"", False
+            if fg_code != fg_:
+                output += fg_code
+            if bg_code != bg_:
+                output += bg_code
+            if bold and not bold_:
+                output += BOLD
+            output += encoded
+            fg_, bg_, bold_ = fg_code, bg_code, bold
+        if repeats:
+            output += self._run_codes(last, repeats, True)
+        if next_cell is not None:
+            output += RESET
+        if scrolled is not None:
+            self._scrolled_rows(*scrolled[1:])
+        return output
+
+    def _run_codes(self, encoded, repeats, at_end):
+        """
+        The shortest output for a character repeated the supplied number of times, right after it was
+        sent along with its colours. Characters can be repeated with REP, if the repeat option is set,
+        and blanks can be erased with ECH in the current background colour, if the erase option is set.
+        Since ECH does not move the cursor, it is followed by a cursor movement unless the run of cells
+        ends there.
+        """
+
+        options = [encoded * repeats]
+        if self.repeat:
+            options.append(ANSICodes.REPEAT.format(repeats).encode("ascii"))
+        if self.erase and encoded == b" ":
+            erase = ANSICodes.ERASE.format(repeats)
+            if not at_end:
+                erase += ANSICodes.FORWARD.format(repeats)
+            options.append(erase.encode("ascii"))
+        return min(options, key=len)
 
-    def paint(self):
+    def paint(self, cache=None, key=None):
         """
         Flushes the screenbuffer to the terminal.
+
+        If the writer has dropped any earlier frames, the cells they contained are sent again.
+
+        If a FrameCache is supplied along with a key identifying everything drawn during this frame,
+        the encoded frame is stored in the cache, so that it can be replayed later on (see replay).
         """
 
-        output = "".join(self._get_redraw_chars())
-        write(1, output.encode("ascii"))
+        if self._resize_pending:
+            self._resize_pending = False
+            self.resize()
+        for cells in self.writer.dropped():
+            self._forget_cells(cells)
+        t_paint = perf_counter() if self.stats is not None else None
+        output = self._encode()
+        if cache is not None and key is not None and self._painted is not None:
+            delta, size = self._frame_delta()
+            cache.put(self._cache_key(key), (output, delta), len(output) + size)
+        t_encoded = perf_counter() if self.stats is not None else None
+        self._write(output)
+        if self.stats is not None:
+            self._record(self._cells_drawn(), len(output), t_paint, t_encoded)
+        self._painted = key
+        self._next_frame()
 
-        self._reset_screen()
+    def replay(self, cache, key):
+        """
+        Paints a frame which was stored in the cache by an earlier paint, without drawing or encoding
+        anything. Returns False if there is no such frame, in which case the frame should be drawn and
+        painted as usual. This must be called before anything is drawn for the frame.
+
+        Since only the cells which changed are sent to the terminal, a stored frame can only be replayed
+        right after the same frame that was painted before it when it was stored, on a screen of the
+        same size. Periodic animations therefore start replaying from their second loop onwards, and
+        again from the loop after the screen is resized.
+        """
+
+        if self._painted is None or self._resize_pending:
+            return False
+        entry = cache.get(self._cache_key(key))
+        if entry is None:
+            return False
+        dropped = self.writer.dropped()
+        for cells in dropped:
+            self._forget_cells(cells)
+        if dropped:
+            return False
+        output, delta = entry
+        self._apply_frame_delta(delta)
+        self.cells_skipped = 0
+        t_encoded = perf_counter() if self.stats is not None else None
+        self._write(output)
+        if self.stats is not None:
+            self._record(0, len(output), t_encoded, t_encoded)
+        self._painted = key
+        return True
+
+    def _cache_key(self, key):
+        """
+        The key under which the frame identified by key is stored in a FrameCache, when painted right
+        after the last frame painted. Frames are only replayed onto a screen of the size they were
+        painted at, since their cells and codes depend on it.
+        """
+
+        return id(self), (self.lines, self.columns), self._painted, key
+
+    def _cells_drawn(self):
+        """
+        The number of cells drawn during this frame.
+        """
+
+        return len(self.redraw)
+
+    def _record(self, drawn, nbytes, t_paint, t_encoded):
+        """
+        Passes the metrics of the frame just written on to the stats object.
+        """
+
+        t_end = perf_counter()
+        t_start = self._t_start if self._t_start is not None else t_paint
+        self.stats.record({
+            "start": t_start,
+            "end": t_end,
+            "drawn": drawn,
+            "emitted": self.cells_emitted,
+            "bytes": nbytes,
+            "draw": self._t_draw,
+            "encode": t_encoded - t_paint,
+            "write": t_end - t_encoded,
+        })
+        self._t_start = None
+        self._t_draw = 0.0
+
+    def _frame_delta(self):
+        """
+        The changes made by the latest paint, namely the emitted cells along with their visible
+        states. Also returns a rough estimate of their size in bytes.
+        """
+
+        emitted = [(cell, self.displayed[cell]) for cell in self._emitted]
+        return emitted, 96 * len(emitted)
+
+    def _apply_frame_delta(self, emitted):
+        """
+        Applies the changes made by an earlier paint, as returned by _frame_delta.
+
+        The cells drawn during the replayed frame are not known, so every displayed cell is considered
+        for redrawing once the next frame is painted as usual.
+        """
+
+        self.displayed.update(emitted)
+        self._emitted = [cell for cell, _ in emitted]
+        self.cells_emitted = len(emitted)
+        self.redraw_past = set(self.displayed)
+        self.redraw = set()
+
+    def _write(self, output):
+        """
+        Passes encoded output on to the writer, along with the cells it contains.
+        """
+
+        self.writer.write(output, self._emitted)
+
+    def _next_frame(self):
+        """
+        Clears the screenbuffer for the next frame, remembering which cells were just drawn.
+
+        The screenbuffer acts as a back buffer, and the displayed dictionary as a front buffer
+        holding what is on the terminal. Only the cells drawn during this frame are cleared, so
+        the work done here is proportional to what was drawn rather than to the size of the screen.
+        """
+
+        self._clear_cells(self.redraw)
         self.redraw_past = self.redraw
         self.redraw = set()
 
 
+class _VisibleCells(dict):
+    """
+    The visible contents of the cells of a screen, keyed by their contents in the screenbuffer and
+    worked out as they are looked up.
+    """
+
+    def __init__(self, term):
+        self.term = term
+
+    def __missing__(self, cell):
+        self[cell] = visible = self.term._visible(*cell)
+        return visible
+
+
 class TermScreenRGB(TermScreen):
     """
     An extension of TermScreenRGB, supporting 24 bit colours (if supported by your terminal).
+
+    For terminals without 24 bit colour, the depth can be set to "256" or "16", in which case colours
+    are quantized to the nearest colour of the corresponding Palette when sent to the terminal. The
+    escape codes are shorter, and neighbouring cells are more likely to share colours.
     """
 
-    def __init__(self, size=None, offset=(0, 0), wrap=False, bg=(0, 0, 0)):
-        super().__init__(size, offset, wrap, bg)
+    def __init__(self, size=None, offset=(0, 0), wrap=False, bg=(0, 0, 0), writer=None, stats=None, depth="truecolor"):
+        super().__init__(size, offset, wrap, bg, writer, stats)
+        self.depth = depth
+        self.palette = Palette.of(depth) if depth != "truecolor" else None
+
+    def set_depth(self, depth):
+        """
+        Changes the colour depth of the screen. Cells already displayed keep their colours until they
+        are drawn again.
+        """
+
+        self.depth = depth
+        self.palette = Palette.of(depth) if depth != "truecolor" else None
+        self._fg_cache.clear()
+        self._bg_cache.clear()
 
     def _mix_rgb(base, top, alpha):
         """
@@ -130,7 +740,7 @@ class TermScreenRGB(TermScreen):
 
         New text characters overwrite previously present ones at the same coordinates.
         Foreground and background colours drawn are blended in with old ones as per the supplied
-        alpha transparency.
+        alpha transparency, and stored as whole bytes.
         """
 
         if not self.wrap and (line, column) not in self.screen:
@@ -138,40 +748,485 @@ class TermScreenRGB(TermScreen):
         line = line % self.lines
         column = column % self.columns
         char_, fg_, bg_, bold_ = self.screen[line, column]
-        fg_new = TermScreenRGB._mix_rgb(bg_, fg, alpha)
-        bg_new = TermScreenRGB._mix_rgb(bg_, bg, alpha)
+        a = TermScreenRGB._fixed_alpha(alpha)
+        fg_new = TermScreenRGB._mix_fixed(bg_, fg, a)
+        bg_new = TermScreenRGB._mix_fixed(bg_, bg, a)
         self.screen[line, column] = (char, fg_new, bg_new, bold)
         self.redraw.add((line, column))
 
-    def _get_redraw_chars(self):
+    def draw_things(self, *things):
         """
-        Converts the screenbuffer contents to proper ANSI codes, and streams them in order.
-        Only the characters which need to be redrawn, i.e. those which differ from the previous
-        buffer are supplied.
+        Draws the supplied objects onto the screenbuffer, in order. Sprites with many cells are drawn
+        as a batch, as by draw_batch.
         """
 
-        off_i, off_j = self.offset
-        for (i, j) in sorted(self.redraw | self.redraw_past):
-            char, fg, bg, bold = self.screen[i, j]
-            fg_code, bg_code = "", ""
-            if fg:
-                r, g, b = fg
-            if bg:
-                R, G, B = bg
-            fg_code = ANSICodes.FG_RGB.format(int(r), int(g), int(b)) if fg else ""
-            bg_code = ANSICodes.BG_RGB.format(int(R), int(G), int(B)) if bg else ""
-            bold_code = ANSICodes.BOLD if bold else ""
-            yield ANSICodes.GOTO.format(1 + i + off_i, 1 + j + off_j) + \
-                fg_code + bg_code + bold_code + char + ANSICodes.RESET
+        t = perf_counter() if self.stats is not None else None
+        for thing in things:
+            if isinstance(thing, Sprite) and len(thing) >= BATCH_MIN_CELLS:
+                self._draw_batch(thing)
+            else:
+                self._draw_cells(thing)
+        if t is not None:
+            self._timed_draw(t)
+
+    def draw_batch(self, *things):
+        """
+        Draws the supplied objects onto the screenbuffer, in order, each as a whole.
+
+        The result is exactly the same as drawing each cell with draw. The cells of each object are
+        clipped or wrapped to the screen and blended all at once, in fixed point arithmetic on arrays
+        of coordinates, colours and alpha values. This needs NumPy; without it, or for objects with
+        more than one cell at the same coordinates, the cells are drawn one by one.
+        """
+
+        t = perf_counter() if self.stats is not None else None
+        for thing in things:
+            self._draw_batch(Sprite.of(thing))
+        if t is not None:
+            self._timed_draw(t)
+
+    def _draw_cells(self, thing):
+        """
+        Draws an object onto the screenbuffer one cell at a time.
+        """
+
+        for cell in thing:
+            self.draw(*cell)
+
+    def _draw_batch(self, thing):
+        """
+        Draws a sprite onto the screenbuffer as a whole.
+
+        Since the screenbuffer is a dictionary, the old background colours are gathered from it and
+        the new cells stored into it cell by cell, but everything in between is done on whole arrays.
+        Screens without a background colour are drawn one cell at a time, since their cells may have
+        no colour to blend with.
+        """
+
+        if np is None or not self.bg:
+            self._draw_cells(thing)
+            return
+        cells = TermScreenRGB._batch_columns(thing)
+        if cells is None:
+            return
+        chars, lines, columns, fg, fg_mask, bg, bg_mask, bold, a = cells
+        if self.wrap:
+            lines = lines % self.lines
+            columns = columns % self.columns
+        else:
+            keep = (lines >= 0) & (lines < self.lines) & (columns >= 0) & (columns < self.columns)
+            if not keep.all():
+                chars, lines, columns, fg, fg_mask, bg, bg_mask, bold, a = (column[keep] for column in cells)
+        n = len(lines)
+        if not n:
+            return
+        if not TermScreenRGB._batch_distinct(thing, self.lines if self.wrap else 0, self.columns if self.wrap else 0):
+            self._draw_cells(thing)
+            return
+
+        keys = list(zip(lines.tolist(), columns.tolist()))
+        screen = self.screen
+        base = np.fromiter(chain.from_iterable(screen[key][2] for key in keys), dtype=float, count=3 * n).reshape(n, 3)
+        fg = TermScreenRGB._blend_fixed(base, fg, fg_mask, a)
+        bg = TermScreenRGB._blend_fixed(base, bg, bg_mask, a)
+        screen.update(zip(keys, zip(chars.tolist(), map(tuple, fg.tolist()), map(tuple, bg.tolist()), bold.tolist())))
+        self.redraw.update(keys)
+
+    def _batch_columns(thing):
+        """
+        Splits a sprite into arrays of characters, lines, columns, foreground colours, foreground
+        masks, background colours, background masks, bold flags and alpha values in 65536ths, with
+        the translation and overrides of the sprite applied. The masks mark the cells which actually
+        have a colour. Returns None if the sprite has no cells.
+
+        The arrays of a sprite are kept in its cache, so they are only built once for all the sprites
+        sharing the same columns.
+        """
+
+        if not len(thing):
+            return None
+        arrays = thing._cache.get("batch")
+        if arrays is None:
+            arrays = thing._cache["batch"] = (
+                np.array(thing.chars, dtype=object),
+                np.array(thing.lines, dtype=np.intp),
+                np.array(thing.columns, dtype=np.intp),
+                *TermScreenRGB._rgb_column(thing, "fgs"),
+                *TermScreenRGB._rgb_column(thing, "bgs"),
+                np.array(thing.bolds, dtype=bool),
+                np.array(thing.alphas, dtype=float),
+            )
+        chars, lines, columns, fg, fg_mask, bg, bg_mask, bold, alpha = arrays
+
+        dy, dx = thing.offset
+        if dy:
+            lines = lines + dy
+        if dx:
+            columns = columns + dx
+        if thing.fg is not None:
+            fg, fg_mask = TermScreenRGB._rgb_constant(thing.fg, len(thing))
+        if thing.bg is not None:
+            bg, bg_mask = TermScreenRGB._rgb_constant(thing.bg, len(thing))
+        if thing.alpha is not None:
+            alpha = np.full(len(thing), thing.alpha, dtype=float)
+        a = np.clip(np.trunc(alpha * 65536 + 0.5), 0, 65536)
+        return chars, lines, columns, fg, fg_mask, bg, bg_mask, bold, a
+
+    def _batch_distinct(thing, lines, columns):
+        """
+        Whether the cells of a sprite all land on different cells of the screen, when wrapped around
+        a screen of the given size, or not wrapped at all if the size is zero. Only the extent of the
+        sprite matters besides its own cells, so the answer is kept in its cache.
+        """
+
+        distinct = thing._cache.get("distinct")
+        if distinct is None:
+            cells = set(zip(thing.lines, thing.columns))
+            distinct = thing._cache["distinct"] = (
+                len(cells) == len(thing),
+                max(thing.lines) - min(thing.lines) + 1,
+                max(thing.columns) - min(thing.columns) + 1,
+            )
+        unique, height, width = distinct
+        if not unique:
+            return False
+        return not lines or height <= lines and width <= columns
+
+    def _rgb_column(thing, name):
+        """
+        A column of colours of a sprite as an array of RGB values, along with a mask marking the
+        colours which are not empty.
+        """
+
+        rgb = thing.rgb(name)
+        if rgb is not None:
+            return rgb.astype(float), np.ones(len(rgb), dtype=bool)
+        colours = getattr(thing, name)
+        mask = np.array([bool(colour) for colour in colours], dtype=bool)
+        rgb = np.array([colour if colour else (0, 0, 0) for colour in colours], dtype=float)
+        return rgb.reshape(-1, 3), mask
+
+    def _rgb_constant(colour, n):
+        """
+        A single colour repeated over n cells, as with _rgb_column.
+        """
+
+        if not colour:
+            return np.zeros((n, 3)), np.zeros(n, dtype=bool)
+        return np.broadcast_to(np.array(colour, dtype=float), (n, 3)), np.ones(n, dtype=bool)
+
+    def _blend_fixed(base, top, mask, a):
+        """
+        Blends arrays of top colours onto arrays of base colours exactly as _mix_fixed does, with the
+        alpha transparencies in 65536ths. Cells whose mask is not set keep their base colour. Returns
+        an array of whole bytes.
+        """
+
+        top = np.where(mask[:, None], top, base)
+        a = np.where(mask, a, 65536)[:, None]
+        mixed = np.floor((base * (65536 - a) + top * a + 32768) / 65536)
+        return np.where(a == 65536, np.trunc(top), mixed).astype(np.int64)
+
+    def _fixed_alpha(alpha):
+        """
+        An alpha transparency as a fixed point fraction, in 65536ths.
+        """
+
+        return min(max(int(alpha * 65536 + 0.5), 0), 65536)
+
+    def _mix_fixed(base, top, a):
+        """
+        Mix two RGB colours as _mix_rgb does, with the alpha transparency given in 65536ths. The top
+        colour is premultiplied by a and the base by 65536 - a, and the sum is rounded back to whole
+        bytes, so every colour returned is a tuple of integers.
+        """
+
+        if not base and not top:
+            return ""
+        if not top:
+            top, a = base, 65536
+        elif not base:
+            a = 65536
+        if a == 65536:
+            r, g, b = top
+            return int(r), int(g), int(b)
+        r1, g1, b1 = base
+        r2, g2, b2 = top
+        inverse = 65536 - a
+        return (
+            int(r1 * inverse + r2 * a + 32768) >> 16,
+            int(g1 * inverse + g2 * a + 32768) >> 16,
+            int(b1 * inverse + b2 * a + 32768) >> 16,
+        )
+
+    def _visible(self, char, fg, bg, bold):
+        """
+        Colours are shown on the terminal as whole bytes, so fractional colours are truncated. With a
+        palette, colours are shown as the nearest colour of the palette.
+        """
+
+        if self.palette is not None:
+            fg = self.palette.quantize(fg) if fg else ""
+            bg = self.palette.quantize(bg) if bg else ""
+        else:
+            fg = tuple(int(c) for c in fg) if fg else ""
+            bg = tuple(int(c) for c in bg) if bg else ""
+        return super()._visible(char, fg, bg, bold)
+
+    def _fg_code(self, fg):
+        """
+        The ANSI code for a 24 bit foreground colour, or for a colour of the palette.
+        """
+
+        if not fg:
+            return ""
+        if self.palette is not None:
+            return self.palette.fg_codes[fg]
+        return ANSICodes.FG_RGB.format(*fg)
+
+    def _bg_code(self, bg):
+        """
+        The ANSI code for a 24 bit background colour, or for a colour of the palette.
+        """
+
+        if not bg:
+            return ""
+        if self.palette is not None:
+            return self.palette.bg_codes[bg]
+        return ANSICodes.BG_RGB.format(*bg)
+
+
+class Sprite:
+    """
+    A compact drawable object, which stores its cells column by column instead of as a list of tuples.
+
+    Iterating over a sprite yields tuples of the form (char, line, column, fg, bg, bold, alpha), so a
+    sprite can be used anywhere a drawable object is expected. Unlike a generator, a sprite can be
+    drawn or modified any number of times.
+
+    The columns of a sprite are shared with the sprites derived from it, and must not be modified.
+    A translation, an alpha transparency and foreground or background colours can be set on top of the
+    columns, and are only applied while the cells are being read. This means that translating or
+    recolouring a sprite takes the same time however many cells it has.
+    """
+
+    __slots__ = ("chars", "lines", "columns", "_fgs", "_bgs", "bolds", "alphas", "offset", "fg", "bg", "alpha", "_cache")
+
+    def __init__(self, chars, lines, columns, fgs, bgs, bolds, alphas):
+        """
+        Creates a sprite from columns of equal length, holding the characters, lines, columns,
+        foreground colours, background colours, bold flags and alpha values of its cells.
+        """
+
+        self.chars = list(chars)
+        self.lines = array("l", lines)
+        self.columns = array("l", columns)
+        self._fgs = list(fgs)
+        self._bgs = list(bgs)
+        self.bolds = list(bolds)
+        self.alphas = array("d", alphas)
+        self.offset = (0, 0)
+        self.fg = None
+        self.bg = None
+        self.alpha = None
+        self._cache = {}
+
+    def of(thing):
+        """
+        Returns the supplied drawable object as a sprite. Sprites are returned as they are, while
+        other drawable objects are read into a new sprite.
+        """
+
+        if isinstance(thing, Sprite):
+            return thing
+        defaults = ("", "", False, 1.0)
+        cells = [cell[:7] if len(cell) >= 7 else cell + defaults[len(cell) - 3:] for cell in thing]
+        if not cells:
+            return Sprite((), (), (), (), (), (), ())
+        return Sprite(*zip(*cells))
+
+    def _derive(self, **changes):
+        """
+        Creates a sprite sharing the columns of this one, with some of its settings changed.
+        """
+
+        sprite = Sprite.__new__(Sprite)
+        for slot in Sprite.__slots__:
+            setattr(sprite, slot, getattr(self, slot))
+        for slot, value in changes.items():
+            setattr(sprite, slot, value)
+        return sprite
+
+    def translate(self, lines, columns):
+        """
+        Returns this sprite with its coordinates translated by the supplied offsets.
+        """
+
+        return self._derive(offset=(self.offset[0] + lines, self.offset[1] + columns))
+
+    def with_fg(self, fg):
+        """
+        Returns this sprite with every cell having the supplied foreground colour.
+        """
+
+        return self._derive(fg=fg)
+
+    def with_bg(self, bg):
+        """
+        Returns this sprite with every cell having the supplied background colour.
+        """
+
+        return self._derive(bg=bg)
+
+    def with_alpha(self, alpha):
+        """
+        Returns this sprite with every cell having the supplied alpha transparency.
+        """
+
+        return self._derive(alpha=alpha)
+
+    def with_columns(self, **columns):
+        """
+        Returns a sprite with some of its columns replaced, such as fgs or bgs. Settings which would
+        hide the new columns are dropped, so that the new colours are not overridden by old ones.
+
+        The fgs and bgs columns may also be given as NumPy arrays of RGB values, in which case they
+        are only converted to lists of tuples if the cells are read one by one.
+        """
+
+        cache = {key: value for key, value in self._cache.items() if key[:3] in ("fgs", "bgs") and key[:3] not in columns}
+        changes = {"_cache": cache}
+        for name, values in columns.items():
+            if name in ("fgs", "bgs"):
+                if np is not None and isinstance(values, np.ndarray):
+                    cache[name + "_rgb"] = values
+                    values = None
+                else:
+                    values = list(values)
+                changes["_" + name] = values
+                changes[name[:2]] = None
+            elif name in ("lines", "columns"):
+                changes[name] = array("l", values)
+            elif name == "alphas":
+                changes[name] = array("d", values)
+                changes["alpha"] = None
+            else:
+                changes[name] = list(values)
+        return self._derive(**changes)
+
+    def _colour_column(self, name):
+        """
+        Reads a column of colours, converting it from an array of RGB values if needed.
+        """
+
+        column = getattr(self, "_" + name)
+        if column is None:
+            column = self._cache.get(name)
+            if column is None:
+                column = self._cache[name] = list(map(tuple, self._cache[name + "_rgb"].tolist()))
+            setattr(self, "_" + name, column)
+        return column
+
+    @property
+    def fgs(self):
+        """
+        The column of foreground colours.
+        """
+
+        return self._colour_column("fgs")
+
+    @property
+    def bgs(self):
+        """
+        The column of background colours.
+        """
+
+        return self._colour_column("bgs")
+
+    def rgb(self, name):
+        """
+        The column of colours called name (fgs or bgs) as a NumPy array of RGB values, if it was
+        supplied as one. Otherwise, returns None.
+        """
+
+        return self._cache.get(name + "_rgb")
+
+    def cell_fgs(self):
+        """
+        The foreground colours of the cells, as they are drawn.
+        """
+
+        return repeat(self.fg, len(self)) if self.fg is not None else self.fgs
+
+    def cell_bgs(self):
+        """
+        The background colours of the cells, as they are drawn.
+        """
+
+        return repeat(self.bg, len(self)) if self.bg is not None else self.bgs
+
+    def cell_alphas(self):
+        """
+        The alpha transparencies of the cells, as they are drawn.
+        """
+
+        return repeat(self.alpha, len(self)) if self.alpha is not None else self.alphas
+
+    def bounds(self):
+        """
+        The bounding box of the cells of this sprite, as a tuple (top, left, bottom, right) of the
+        first and last lines and columns covered. Returns None if the sprite has no cells.
+        """
+
+        if not len(self):
+            return None
+        bounds = self._cache.get("bounds")
+        if bounds is None:
+            bounds = self._cache["bounds"] = (min(self.lines), min(self.columns), max(self.lines), max(self.columns))
+        dy, dx = self.offset
+        top, left, bottom, right = bounds
+        return top + dy, left + dx, bottom + dy, right + dx
+
+    def cells_within(self, bounds):
+        """
+        The set of coordinates of the cells of this sprite which lie within the supplied bounding box.
+        """
+
+        top, left, bottom, right = bounds
+        dy, dx = self.offset
+        top, left, bottom, right = top - dy, left - dx, bottom - dy, right - dx
+        return {
+            (i + dy, j + dx) for i, j in zip(self.lines, self.columns)
+            if top <= i <= bottom and left <= j <= right
+        }
+
+    def covers(self, i, j):
+        """
+        Whether this sprite has a cell at the supplied coordinates.
+        """
+
+        cells = self._cache.get("cells")
+        if cells is None:
+            cells = self._cache["cells"] = set(zip(self.lines, self.columns))
+        return (i - self.offset[0], j - self.offset[1]) in cells
+
+    def __len__(self):
+        return len(self.chars)
+
+    def __iter__(self):
+        dy, dx = self.offset
+        cells = zip(self.chars, self.lines, self.columns, self.cell_fgs(), self.cell_bgs(), self.bolds, self.cell_alphas())
+        for char, i, j, fg, bg, bold, alpha in cells:
+            yield char, i + dy, j + dx, fg, bg, bold, alpha
 
 
 class TermThings:
     """
     A collection of methods for generating drawable objects, and modifying their properties.
 
-    Drawable objects are created as generators of tuples instead of lists. Note that most
-    methods consume these generated tuples, so it is advised to list them if you need to modify
-    the objects multiple times.
+    Drawable objects are created as sprites, which can be drawn and modified as many times as needed.
+    Every method also accepts other drawable objects, such as lists or generators of tuples, and
+    returns a sprite.
 
     Parameters such as the foreground and background colour will be strings if you intend
     to use the TermScreen class, or tuples if you intend to use the TermScreenRGB class.
@@ -183,8 +1238,9 @@ class TermThings:
         alpha transparency.
         """
 
-        for n, char in enumerate(text):
-            yield char, line, column + n, fg, bg, bold, alpha
+        n = len(text)
+        return Sprite(text, repeat(line, n), range(column, column + n), repeat(fg, n), repeat(bg, n),
+                      repeat(bold, n), repeat(alpha, n))
 
     def box(char, lines, columns, fg="", bg="", bold=False, alpha=1.0):
         """
@@ -194,33 +1250,31 @@ class TermThings:
         a grid or hollow box with a boundary by simply passing lists of integers with missing values.
         """
 
-        for i in lines:
-            for j in columns:
-                yield char, i, j, fg, bg, bold, alpha
+        lines, columns = list(lines), list(columns)
+        n = len(lines) * len(columns)
+        return Sprite(repeat(char, n), (i for i in lines for j in columns), columns * len(lines),
+                      repeat(fg, n), repeat(bg, n), repeat(bold, n), repeat(alpha, n))
 
     def fg(thing, fg):
         """
         Takes a drawable object and generates an identical one with the supplied foreground colour.
         """
 
-        for (char, i, j, _, bg, bold, alpha) in thing:
-            yield char, i, j, fg, bg, bold, alpha
+        return Sprite.of(thing).with_fg(fg)
 
     def bg(thing, bg):
         """
         Takes a drawable object and generates an identical one with the supplied background colour.
         """
 
-        for (char, i, j, fg, _, bold, alpha) in thing:
-            yield char, i, j, fg, bg, bold, alpha
+        return Sprite.of(thing).with_bg(bg)
 
     def alpha(thing, alpha):
         """
         Takes a drawable object and generates an identical one with the supplied alpha transparency.
         """
 
-        for (char, i, j, fg, bg, bold, _) in thing:
-            yield char, i, j, fg, bg, bold, alpha
+        return Sprite.of(thing).with_alpha(alpha)
 
     def gradient_right(thing, fg="", bg="", mix=1.0):
         """
@@ -231,15 +1285,7 @@ class TermThings:
         on the right.
         """
 
-        thing = list(thing)
-        columns = {j for _, _, j, *_ in thing}
-        left, right = min(columns), max(columns)
-        delta = right - left
-        for (char, i, j, fg_left, bg_left, bold, alpha) in thing:
-            alpha_mix = (j - left) / delta * mix
-            fg_new = TermScreenRGB._mix_rgb(fg_left, fg, alpha_mix)
-            bg_new = TermScreenRGB._mix_rgb(bg_left, bg, alpha_mix)
-            yield char, i, j, fg_new, bg_new, bold, alpha
+        return TermThings.gradient(thing, fg, bg, lambda y, x: x * mix)
 
     def gradient_down(thing, fg="", bg="", mix=1.0):
         """
@@ -250,15 +1296,7 @@ class TermThings:
         on the bottom.
         """
 
-        thing = list(thing)
-        rows = {i for _, i, _, *_ in thing}
-        top, bottom = min(rows), max(rows)
-        delta = bottom - top
-        for (char, i, j, fg_top, bg_top, bold, alpha) in thing:
-            alpha_mix = (i - top) / delta * mix
-            fg_new = TermScreenRGB._mix_rgb(fg_top, fg, alpha_mix)
-            bg_new = TermScreenRGB._mix_rgb(bg_top, bg, alpha_mix)
-            yield char, i, j, fg_new, bg_new, bold, alpha
+        return TermThings.gradient(thing, fg, bg, lambda y, x: y * mix)
 
     def gradient(thing, fg="", bg="", mixfunc=lambda y, x: 1.0):
         """
@@ -271,20 +1309,119 @@ class TermThings:
         For example, a linear gradient from left to right would be represented by a mixfunc of (y, x) -> x.
         A radial gradient would be of the form (y, x) -> a / ((0.5 - x)**2 + (0.5 - y)**2 + a), where the
         constant 'a' determines how steeply the new colour drops off from the center.
+
+        If NumPy is available, the mixfunc is first called once with arrays of coordinates, falling back
+        to one call per cell if that fails or does not return an array of mix strengths. The mix
+        strengths are cached by the shape of the object and the mixfunc, so identically shaped objects
+        share them, as long as the mixfunc reads nothing but its arguments and plain values such as
+        numbers held in its closure (see _func_key). Other mixfuncs are called afresh every time.
         """
 
-        thing = list(thing)
-        rows = {i for _, i, _, *_ in thing}
-        columns = {j for _, _, j, *_ in thing}
-        left, right = min(columns), max(columns)
-        top, bottom = min(rows), max(rows)
-        height, width = bottom - top, right - left
-        for (char, i, j, fg_top, bg_top, bold, alpha) in thing:
-            y, x = (i - top) / height, (j - left) / width
-            alpha_mix = mixfunc(y, x)
-            fg_new = TermScreenRGB._mix_rgb(fg_top, fg, alpha_mix)
-            bg_new = TermScreenRGB._mix_rgb(bg_top, bg, alpha_mix)
-            yield char, i, j, fg_new, bg_new, bold, alpha
+        thing = Sprite.of(thing)
+        mixes = TermThings._mixes(thing, mixfunc)
+        columns = {}
+        if fg:
+            columns["fgs"] = TermThings._mix_colours(thing, "fg", fg, mixes)
+        if bg:
+            columns["bgs"] = TermThings._mix_colours(thing, "bg", bg, mixes)
+        return thing.with_columns(**columns)
+
+    _mixes_cache = {}
+    _mixes_cache_size = 64
+
+    def _mixes(thing, mixfunc):
+        """
+        Evaluates the mixfunc of a gradient over every cell of a sprite.
+        """
+
+        if np is not None:
+            lines = np.array(thing.lines, dtype=np.intp)
+            columns = np.array(thing.columns, dtype=np.intp)
+            lines -= lines.min()
+            columns -= columns.min()
+            shape = (lines.tobytes(), columns.tobytes())
+        else:
+            top, left = min(thing.lines), min(thing.columns)
+            lines = [i - top for i in thing.lines]
+            columns = [j - left for j in thing.columns]
+            shape = (tuple(lines), tuple(columns))
+
+        func_key = TermThings._func_key(mixfunc)
+        key = (func_key, shape) if func_key is not None else None
+        mixes = TermThings._mixes_cache.get(key) if key is not None else None
+        if mixes is not None:
+            return mixes
+
+        if np is not None:
+            height, width = int(lines.max()) or 1, int(columns.max()) or 1
+            try:
+                mixes = np.asarray(mixfunc(lines / height, columns / width), dtype=float)
+            except Exception:
+                mixes = None
+            # A mixfunc which returns a single value for whole arrays may not treat them as arrays, so
+            # it is called once for each cell instead.
+            if mixes is None or mixes.shape != lines.shape:
+                mixes = np.array([mixfunc(i / height, j / width) for i, j in zip(lines.tolist(), columns.tolist())], dtype=float)
+        else:
+            height, width = max(lines) or 1, max(columns) or 1
+            mixes = [mixfunc(i / height, j / width) for i, j in zip(lines, columns)]
+
+        if key is not None:
+            if len(TermThings._mixes_cache) >= TermThings._mixes_cache_size:
+                del TermThings._mixes_cache[next(iter(TermThings._mixes_cache))]
+            TermThings._mixes_cache[key] = mixes
+        return mixes
+
+    def _func_key(func):
+        """
+        A key identifying what a function computes, namely its code along with its default arguments
+        and closure variables. Distinct lambdas created by the same expression thus share a key.
+
+        Returns None if what the function computes may change from one call to the next, in which case
+        its results are not cached. This is so unless the function is a plain function reading nothing
+        but its arguments, and default arguments and closure variables holding plain values, such as
+        numbers and tuples of numbers. Functions which read global variables or attributes (say, of
+        a bound object, or of the random module) are never cached.
+        """
+
+        code = getattr(func, "__code__", None)
+        if code is None or hasattr(func, "__self__"):
+            return None
+        codes = [code]
+        while codes:
+            code_ = codes.pop()
+            if code_.co_names:
+                return None
+            codes.extend(const for const in code_.co_consts if hasattr(const, "co_names"))
+        closure = tuple(cell.cell_contents for cell in func.__closure__ or ())
+        defaults = func.__defaults__ or ()
+        if not all(TermThings._plain(value) for value in closure + defaults):
+            return None
+        return code, defaults, closure
+
+    def _plain(value):
+        """
+        Whether a value is a number, string, None or a tuple of these, which cannot change.
+        """
+
+        if isinstance(value, tuple):
+            return all(TermThings._plain(item) for item in value)
+        return value is None or isinstance(value, (bool, int, float, complex, str, bytes))
+
+    def _mix_colours(thing, name, colour, mixes):
+        """
+        Mixes the supplied colour into the foreground or background colours (name being fg or bg) of
+        a sprite, with the mix strength of each cell given by mixes. Equivalent to calling
+        TermScreenRGB._mix_rgb on each cell, but done on whole arrays if NumPy is available.
+        """
+
+        colours = thing.cell_fgs() if name == "fg" else thing.cell_bgs()
+        if np is None:
+            return [TermScreenRGB._mix_rgb(colour_, colour, mix) for colour_, mix in zip(colours, mixes)]
+        base = thing.rgb(name + "s") if getattr(thing, name) is None else None
+        if base is None:
+            base = np.array([colour_ if colour_ else colour for colour_ in colours], dtype=float).reshape(-1, 3)
+        return base + (np.array(colour, dtype=float) - base) * mixes[:, None]
 
     def translate(thing, lines, columns):
         """
@@ -292,16 +1429,37 @@ class TermThings:
         supplied offsets.
         """
 
-        for (char, i, j, fg, bg, bold, alpha) in thing:
-            yield char, i + lines, j + columns, fg, bg, bold, alpha
+        return Sprite.of(thing).translate(lines, columns)
 
     def intersection(*things):
         """
         Takes a number of drawable objects and returns a set of their intersecting coordinates.
+
+        Only the cells within the overlap of the bounding boxes of the objects are compared, and
+        objects whose bounding boxes do not overlap are not compared at all.
         """
 
-        things = [list(thing) for thing in things]
-        cells = {(i, j) for _, i, j, *_ in things[0]}
+        things = [Sprite.of(thing) for thing in things]
+        overlap = TermThings.overlap(*(thing.bounds() for thing in things))
+        if overlap is None:
+            return set()
+        things.sort(key=len)
+        cells = things[0].cells_within(overlap)
         for thing in things[1:]:
-            cells &= {(i, j) for _, i, j, *_  in thing}
+            cells = {(i, j) for i, j in cells if thing.covers(i, j)}
         return cells
+
+    def overlap(*bounds):
+        """
+        Takes a number of bounding boxes, of the form (top, left, bottom, right), and returns the
+        bounding box of their overlap. Returns None if they do not all overlap, or if any of them is None.
+        """
+
+        if not bounds or None in bounds:
+            return None
+        top, left, bottom, right = bounds[0]
+        for t, l, b, r in bounds[1:]:
+            top, left, bottom, right = max(top, t), max(left, l), min(bottom, b), min(right, r)
+        if top > bottom or left > right:
+            return None
+        return top, left, bottom, right
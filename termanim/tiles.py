@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+
+import weakref
+from os import cpu_count
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+
+from .arrays import TermScreenArray
+from .palette import Palette
+
+# The planes of a TermScreenArray which are kept in shared memory.
+PLANES = [
+    "char_plane", "fg_plane", "bg_plane", "bold_plane",
+    "base_char", "base_fg", "base_bg", "base_bold", "frozen",
+    "redraw", "redraw_past",
+    "shown", "shown_char", "shown_fg", "shown_bg", "shown_bold",
+]
+
+class TermScreenTiled(TermScreenArray):
+    """
+    A version of TermScreenArray which blends and encodes frames in a pool of processes, for large
+    screens with many objects.
+
+    The screen is split into horizontal bands of whole lines, and the planes of the screen are kept
+    in shared memory so that each process can work on its bands in place. Objects passed to
+    draw_things are gathered up, and blended once the frame is painted. Each band is then blended
+    and encoded by a process of the pool, and the encoded bands are joined in order and written at
+    once. Since runs of cells never cross lines, and every run starts with a cursor movement and ends
+    with a reset, the output is exactly the same as that of TermScreenArray.
+
+    The pool is started along with the screen, and should be shut down with close once the screen is
+    no longer needed. With a single band, everything is done in the calling process. Since the
+    blending happens while painting, the time spent on it counts towards encoding in the metrics
+    recorded by a stats object.
+    """
+
+    def __init__(self, size=None, offset=(0, 0), wrap=False, bg=(0, 0, 0), writer=None, stats=None,
+            depth="truecolor", bands=None, processes=None):
+        super().__init__(size, offset, wrap, bg, writer, stats, depth)
+        self.processes = processes if processes is not None else min(cpu_count() or 1, 8)
+        self._band_count = bands if bands is not None else self.processes
+        self._split()
+        self._pending = []
+        self._pool = None
+        self._memory = None
+        if len(self.bands) > 1:
+            self._share()
+            self._pool = ProcessPoolExecutor(max_workers=self.processes)
+        self._finalizer = weakref.finalize(self, TermScreenTiled._release, self._pool, self._memory)
+
+    def _split(self):
+        """
+        Splits the lines of the screen into bands of nearly equal size.
+        """
+
+        bands = max(min(self._band_count, self.lines), 1)
+        self.bands = [(self.lines * k // bands, self.lines * (k + 1) // bands) for k in range(bands)]
+
+    def _share(self):
+        """
+        Moves the planes of the screen into a single block of shared memory.
+        """
+
+        self._layout = {}
+        size = 0
+        for name in PLANES:
+            plane = getattr(self, name)
+            size = -(-size // 16) * 16
+            self._layout[name] = (size, plane.dtype.str, plane.shape)
+            size += plane.nbytes
+        self._memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for name in PLANES:
+            offset, dtype, shape = self._layout[name]
+            plane = np.ndarray(shape, dtype=dtype, buffer=self._memory.buf, offset=offset)
+            plane[...] = getattr(self, name)
+            setattr(self, name, plane)
+
+    def _release(pool, memory):
+        if pool is not None:
+            pool.shutdown()
+        if memory is not None:
+            memory.close()
+            memory.unlink()
+
+    def close(self):
+        """
+        Shuts down the pool of processes, and frees the shared memory. The planes of the screen are
+        copied out of the shared memory first, so the screen can still be used, without the pool.
+        """
+
+        if self._memory is not None:
+            for name in PLANES:
+                setattr(self, name, getattr(self, name).copy())
+        self._finalizer()
+        self._pool = None
+        self._memory = None
+
+    def _resize_buffers(self, lines, columns, repaint):
+        """
+        Reallocates the planes of the screen as with TermScreenArray, and then moves them into a new
+        block of shared memory, split into bands afresh. Objects gathered up so far are blended first.
+        """
+
+        if self._pending:
+            self._flush()
+        super()._resize_buffers(lines, columns, repaint)
+        self._split()
+        if self._pool is not None:
+            self._finalizer.detach()
+            TermScreenTiled._release(None, self._memory)
+            self._share()
+            self._finalizer = weakref.finalize(self, TermScreenTiled._release, self._pool, self._memory)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def draw_things(self, *things):
+        """
+        Gathers up the supplied objects, to be blended onto the screenbuffer when the frame is painted.
+        """
+
+        if self._pool is None:
+            return super().draw_things(*things)
+        for thing in things:
+            columns = TermScreenArray._columns(thing)
+            if columns is not None:
+                self._pending.append(columns)
+
+    def _flush(self, encode=False):
+        """
+        Blends the objects gathered up so far onto the screenbuffer, one band per process. If encode
+        is set, the bands are also encoded, and the encoded bands are returned in order.
+        """
+
+        if self._pending:
+            cells = [np.concatenate(column) for column in zip(*self._pending)]
+            self._pending = []
+            lines, columns = cells[1], cells[2]
+            if self.wrap:
+                cells[1], cells[2] = lines % self.lines, columns % self.columns
+            else:
+                keep = (lines >= 0) & (lines < self.lines) & (columns >= 0) & (columns < self.columns)
+                cells = [column[keep] for column in cells]
+            starts = np.array([start for start, _ in self.bands])
+            band = np.searchsorted(starts, cells[1], side="right") - 1
+            order = np.argsort(band, kind="stable")
+            cells = [column[order] for column in cells]
+            bounds = np.searchsorted(band[order], np.arange(len(self.bands) + 1))
+        else:
+            cells, bounds = None, np.zeros(len(self.bands) + 1, dtype=np.intp)
+
+        tasks = []
+        settings = (self.columns, self.offset, self.bg, self.depth, self.repeat, self.erase)
+        for k, (start, stop) in enumerate(self.bands):
+            band_cells = None
+            if bounds[k] < bounds[k + 1]:
+                band_cells = [column[bounds[k]:bounds[k + 1]] for column in cells]
+                band_cells[1] = band_cells[1] - start
+            if band_cells is None and not encode:
+                continue
+            task = (self._memory.name, self._layout, start, stop, settings, band_cells, encode)
+            tasks.append(self._pool.submit(_render_band, task))
+        return [task.result() for task in tasks]
+
+    def _encode(self):
+        """
+        Blends and encodes every band in the pool, joining the encoded bands in order. If the terminal
+        is to be scrolled, the bands are blended first, so that the scroll can be found.
+        """
+
+        if self._pool is None:
+            return super()._encode()
+        scrolled = None
+        if self.scroll:
+            if self._pending:
+                self._flush()
+            scrolled = self._scroll()
+        results = self._flush(encode=True)
+        self._emitted = (
+            np.concatenate([lines for _, lines, _, _ in results]),
+            np.concatenate([columns for _, _, columns, _ in results]),
+        )
+        self.cells_skipped = sum(skipped for _, _, _, skipped in results)
+        self.cells_emitted = len(self._emitted[0])
+        output = b"".join(output for output, _, _, _ in results)
+        if scrolled is not None:
+            self._scrolled_rows(*scrolled[1:])
+            output = scrolled[0] + output
+        return output
+
+    def draw(self, char, line, column, fg="", bg="", bold=False, alpha=1.0, *args):
+        if self._pending:
+            self._flush()
+        super().draw(char, line, column, fg, bg, bold, alpha)
+
+    def paste(self, line, column, chars, fg, bg):
+        if self._pending:
+            self._flush()
+        super().paste(line, column, chars, fg, bg)
+
+    def freeze(self):
+        if self._pending:
+            self._flush()
+        super().freeze()
+
+    def thaw(self):
+        if self._pending:
+            self._flush()
+        super().thaw()
+
+    @property
+    def screen(self):
+        if self._pending:
+            self._flush()
+        return super().screen
+
+    def _next_frame(self):
+        """
+        Clears the screenbuffer for the next frame, as with TermScreenArray. The redraw masks are
+        copied instead of swapped, since they stay in place in shared memory.
+        """
+
+        lines, columns = np.nonzero(self.redraw)
+        self.char_plane[lines, columns] = self.base_char[lines, columns]
+        self.fg_plane[lines, columns] = self.base_fg[lines, columns]
+        self.bg_plane[lines, columns] = self.base_bg[lines, columns]
+        self.bold_plane[lines, columns] = self.base_bold[lines, columns]
+        self.redraw_past[...] = self.redraw
+        self.redraw.fill(False)
+
+
+# The bands of screens seen by this process, keyed by the name of their shared memory and their lines.
+_bands = {}
+
+def _attach(name):
+    """
+    Attaches to a block of shared memory created by another process, which remains responsible for
+    unlinking it. Before Python 3.13 the block cannot be left untracked, but the processes of a pool
+    share the resource tracker of the process which created it, so the block is not unlinked early.
+    """
+
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+def _band_screen(name, layout, start, stop, settings):
+    """
+    A TermScreenArray covering the given lines of a screen held in shared memory, whose planes are
+    views of the shared planes. Band screens are kept for as long as their shared memory is in use,
+    and their settings are brought up to date with those of the screen every time.
+    """
+
+    key = (name, start, stop)
+    if key in _bands:
+        return _band_settings(_bands[key][1], start, settings)
+    for other in [other for other in _bands if other[0] != name]:
+        _bands.pop(other)[0].close()
+    memory = _attach(name)
+    columns, _, _, depth, _, _ = settings
+    band = TermScreenArray.__new__(TermScreenArray)
+    for plane, (offset, dtype, shape) in layout.items():
+        view = np.ndarray(shape, dtype=dtype, buffer=memory.buf, offset=offset)
+        setattr(band, plane, view[start:stop])
+    band.lines, band.columns = stop - start, columns
+    band.wrap = False
+    band.scroll = False
+    band.stats = None
+    band.depth = depth
+    band.palette = Palette.of(depth) if depth != "truecolor" else None
+    band._set_lut()
+    band._candidates = np.zeros((band.lines, columns), dtype=bool)
+    band._cursor_shape = None
+    band._fg_cache, band._bg_cache, band._char_cache = {}, {}, {}
+    _bands[key] = (memory, band)
+    return _band_settings(band, start, settings)
+
+def _band_settings(band, start, settings):
+    """
+    Brings the offset, background colour, colour depth and run compression of a band screen up to
+    date with the settings of the screen it belongs to.
+    """
+
+    _, (off_i, off_j), bg, depth, repeat, erase = settings
+    band.offset = (off_i + start, off_j)
+    band.bg = bg
+    band.repeat, band.erase = repeat, erase
+    if band.depth != depth:
+        band.set_depth(depth)
+    return band
+
+def _render_band(task):
+    """
+    Blends cells onto a band of a screen, and encodes the band if asked to. Returns the encoded band
+    along with the lines and columns of the cells emitted, and the number of cells skipped.
+    """
+
+    name, layout, start, stop, settings, cells, encode = task
+    band = _band_screen(name, layout, start, stop, settings)
+    if cells is not None:
+        band._blend(*cells)
+    if not encode:
+        return None
+    output = band._encode()
+    lines, columns = band._emitted
+    return bytes(output), lines + start, columns, band.cells_skipped
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+import random
+
+from termanim.term import TermThings
+
+a = 0.0
+
+def shade(y, x):
+    return a
+
+
+class Radial:
+    def __init__(self, strength):
+        self.strength = strength
+
+    def mix(self, y, x):
+        return self.strength
+
+
+def gradient_bgs(mixfunc, distinct=True):
+    box = TermThings.box(" ", range(4), range(6), bg=(0, 0, 0))
+    bgs = [tuple(int(c) for c in bg) for bg in TermThings.gradient(box, bg=(255, 255, 255), mixfunc=mixfunc).bgs]
+    return set(bgs) if distinct else bgs
+
+
+def test_gradient_reads_globals_afresh():
+    global a
+    a = 0.0
+    assert gradient_bgs(shade) == {(0, 0, 0)}
+    a = 1.0
+    assert gradient_bgs(shade) == {(255, 255, 255)}
+
+
+def test_gradient_bound_methods():
+    assert gradient_bgs(Radial(0.0).mix) == {(0, 0, 0)}
+    assert gradient_bgs(Radial(1.0).mix) == {(255, 255, 255)}
+
+
+def test_gradient_reads_closure_attributes_afresh():
+    radial = Radial(0.0)
+    mixfunc = lambda y, x: radial.strength
+    assert gradient_bgs(mixfunc) == {(0, 0, 0)}
+    radial.strength = 1.0
+    assert gradient_bgs(mixfunc) == {(255, 255, 255)}
+
+
+def test_gradient_random_mixes():
+    mixfunc = lambda y, x: random.random()
+    first, second = gradient_bgs(mixfunc, distinct=False), gradient_bgs(mixfunc, distinct=False)
+    assert len(set(first)) > 1
+    assert first != second
+
+
+def test_gradient_caches_pure_mixfuncs():
+    mix = 0.5
+    assert TermThings._func_key(lambda y, x: 0.7 / ((1 - x)**2 + (1 - y)**2 + 1.0)) is not None
+    assert TermThings._func_key(lambda y, x: x * mix) is not None
+    assert TermThings._func_key(shade) is None
+    assert TermThings._func_key(Radial(0.0).mix) is None